@@ -0,0 +1,42 @@
+"""
+PDF text extraction that can run in worker processes.
+
+This module only depends on PyMuPDF so that process pool workers start
+quickly and never load the embedding model or open database connections.
+"""
+
+from typing import List, Tuple
+
+import fitz  # PyMuPDF
+
+
+def warm_up() -> str:
+    """No-op task used to start pool workers ahead of the first upload"""
+    return fitz.VersionBind
+
+
+def pdf_page_count(file_path: str) -> int:
+    """Return the number of pages in a PDF on disk"""
+    with fitz.open(file_path, filetype="pdf") as pdf_doc:
+        return len(pdf_doc)
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) from a PDF on disk"""
+    with fitz.open(file_path, filetype="pdf") as pdf_doc:
+        return [pdf_doc[page_num].get_text() for page_num in range(start, stop)]
+
+
+def split_page_range(page_count: int, parts: int, min_pages: int = 1) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most `parts` contiguous ranges of at least `min_pages` pages"""
+    if page_count <= 0:
+        return []
+    parts = max(1, min(parts, page_count // max(1, min_pages) or 1))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
@@ -1,9 +1,13 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.datastructures import Headers
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from bson import Binary
 from pydantic import BaseModel, Field
-from typing import List, Optional, AsyncGenerator, Dict, Any
+from typing import List, Optional, AsyncGenerator, AsyncIterator, Dict, Any, Literal
 from pathlib import Path
 from dotenv import load_dotenv
 import os
@@ -11,29 +15,52 @@ import logging
 import uuid
 from datetime import datetime
 import json
+import base64
 import asyncio
 import io
 import hashlib
+import tempfile
+import time
+import functools
+import multiprocessing
+import sqlite3
+import sys
+import threading
+import re
+import unicodedata
+from array import array
+from collections import Counter, OrderedDict
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # RAG System Imports
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
-from sentence_transformers import SentenceTransformer
-import fitz  # PyMuPDF
-from langdetect import detect
-import nltk
-from sklearn.metrics.pairwise import cosine_similarity
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, Range,
+    FilterSelector, PayloadSchemaType, HnswConfigDiff, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    Disabled
+)
+from pdf_extraction import warm_up, pdf_page_count, extract_page_range, split_page_range
+from langdetect import DetectorFactory, LangDetectException, detect_langs
 import numpy as np
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
 # Emergent integrations for Gemini
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
+# Token streaming goes through litellm (installed with emergentintegrations);
+# without it responses fall back to a single LlmChat.send_message call
+try:
+    from litellm import acompletion
+except ImportError:
+    acompletion = None
+
+# Uploads are parsed as they stream in; the package is importable as multipart before 0.0.13
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -42,12 +69,200 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Ingestion tuning
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', '32'))
+BULK_WRITE_BATCH_SIZE = int(os.environ.get('BULK_WRITE_BATCH_SIZE', '500'))
+BULK_WRITE_FLUSH_INTERVAL = float(os.environ.get('BULK_WRITE_FLUSH_INTERVAL', '2.0'))
+INGESTION_WORKERS = int(os.environ.get('INGESTION_WORKERS', '2'))
+QUERY_WORKERS = int(os.environ.get('QUERY_WORKERS', '4'))
+INGESTION_QUEUE_WORKERS = int(os.environ.get('INGESTION_QUEUE_WORKERS', '2'))
+INGESTION_QUEUE_MAX_DEPTH = int(os.environ.get('INGESTION_QUEUE_MAX_DEPTH', '20'))
+INGESTION_MAX_RETRIES = int(os.environ.get('INGESTION_MAX_RETRIES', '2'))
+INGESTION_JOB_HISTORY = int(os.environ.get('INGESTION_JOB_HISTORY', '1000'))
+# Documents with more chunks than this are deleted in the background unless the caller chooses
+DOCUMENT_DELETE_ASYNC_THRESHOLD = int(os.environ.get('DOCUMENT_DELETE_ASYNC_THRESHOLD', '5000'))
+# When set, MongoDB's profiler records operations slower than this for the slow-query report
+MONGO_PROFILE_SLOW_MS = int(os.environ.get('MONGO_PROFILE_SLOW_MS', '0'))
+
+# Uploads are streamed to a temp file (UPLOAD_TMP_DIR, default system temp dir)
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(200 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR')
+
+# Separate pools stop queries from queueing behind ingestion, but they do not isolate CPU:
+# torch spreads each encode over every core. So each pool thread caps the intra-op threads
+# of its own torch work (OpenMP applies the setting per calling thread), and the defaults
+# split the cores between queries and ingestion. ONNX Runtime sessions have one intra-op
+# pool shared by every caller, so the onnx backends do not isolate query latency from ingestion.
+QUERY_INTRA_OP_THREADS = int(os.environ.get('QUERY_INTRA_OP_THREADS', str(max(1, (os.cpu_count() or 1) // 2))))
+INGESTION_INTRA_OP_THREADS = int(os.environ.get(
+    'INGESTION_INTRA_OP_THREADS',
+    str(max(1, ((os.cpu_count() or 1) - QUERY_INTRA_OP_THREADS) // max(1, INGESTION_WORKERS)))
+))
+_pool_thread = threading.local()
+
+def set_intra_op_threads(threads: int):
+    """Pool thread initializer: record the intra-op thread cap for torch work run on this thread"""
+    _pool_thread.intra_op_threads = threads
+
+def apply_intra_op_threads():
+    """Apply the calling pool thread's cap, once per thread, after the caller loaded torch"""
+    threads = getattr(_pool_thread, "intra_op_threads", None)
+    torch = sys.modules.get("torch")
+    if threads is None or torch is None or getattr(_pool_thread, "applied", False):
+        return
+    torch.set_num_threads(threads)
+    _pool_thread.applied = True
+
+# CPU-bound work (PDF parsing, language detection, encoding) runs in dedicated
+# pools so the event loop stays responsive; queries get their own pool so
+# running uploads cannot starve them
+ingestion_executor = ThreadPoolExecutor(
+    max_workers=INGESTION_WORKERS, thread_name_prefix="ingestion",
+    initializer=set_intra_op_threads, initargs=(INGESTION_INTRA_OP_THREADS,)
+)
+query_executor = ThreadPoolExecutor(
+    max_workers=QUERY_WORKERS, thread_name_prefix="query",
+    initializer=set_intra_op_threads, initargs=(QUERY_INTRA_OP_THREADS,)
+)
+
+# Page-parallel PDF extraction: large documents are split into page ranges and
+# extracted in a process pool (PDF_EXTRACTION_MODE=serial disables it)
+PDF_EXTRACTION_MODE = os.environ.get('PDF_EXTRACTION_MODE', 'parallel')
+PDF_EXTRACTION_PROCESSES = int(os.environ.get('PDF_EXTRACTION_PROCESSES', str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '32'))
+PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', '8'))
+# Pages extracted per pipeline step; bounds memory independently of document size
+PDF_PAGE_WINDOW = int(os.environ.get('PDF_PAGE_WINDOW', '128'))
+_extraction_executor: Optional[ProcessPoolExecutor] = None
+
+def get_extraction_executor() -> ProcessPoolExecutor:
+    """Create the extraction process pool on first use"""
+    global _extraction_executor
+    if _extraction_executor is None:
+        # Spawned workers import only pdf_extraction, not this module and its models
+        _extraction_executor = ProcessPoolExecutor(
+            max_workers=PDF_EXTRACTION_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _extraction_executor
+
+async def run_in_executor(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    """Run a blocking callable in the given pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
 # Initialize RAG components
-# Use in-memory Qdrant for development (no Docker needed)
-qdrant_client = QdrantClient(":memory:")
+# Qdrant server when QDRANT_URL is set, otherwise local on-disk storage under
+# QDRANT_PATH (single process only); QDRANT_PATH=:memory: keeps vectors in RAM
+QDRANT_URL = os.environ.get('QDRANT_URL')
+QDRANT_PATH = os.environ.get('QDRANT_PATH', str(ROOT_DIR / 'qdrant_storage'))
+VECTOR_RESTORE_BATCH_SIZE = int(os.environ.get('VECTOR_RESTORE_BATCH_SIZE', '512'))
+
+# Vector store backend: qdrant, or numpy for exact search over a memory-mapped float16
+# matrix under NUMPY_STORE_PATH (small and medium corpora, single process only)
+VECTOR_STORE_BACKEND = os.environ.get('VECTOR_STORE_BACKEND', 'qdrant').lower()
+NUMPY_STORE_PATH = os.environ.get('NUMPY_STORE_PATH', str(ROOT_DIR / 'vector_store'))
+
+# Vector index tuning (applied by a Qdrant server; local mode always searches exactly).
+# VECTOR_QUANTIZATION is none, scalar (int8, 4x smaller) or binary (1 bit, 32x smaller);
+# quantized vectors stay in RAM while VECTOR_ON_DISK moves the float32 originals to disk
+# (collection creation only). Rescoring re-ranks oversampled candidates with the originals.
+VECTOR_QUANTIZATION = os.environ.get('VECTOR_QUANTIZATION', 'none').lower()
+VECTOR_ON_DISK = os.environ.get('VECTOR_ON_DISK', 'false').lower() in ('1', 'true', 'yes')
+QUANTIZATION_RESCORE = os.environ.get('QUANTIZATION_RESCORE', 'true').lower() in ('1', 'true', 'yes')
+QUANTIZATION_OVERSAMPLING = float(os.environ.get('QUANTIZATION_OVERSAMPLING', '2.0'))
+HNSW_M = int(os.environ.get('HNSW_M', '16'))
+HNSW_EF_CONSTRUCT = int(os.environ.get('HNSW_EF_CONSTRUCT', '100'))
+# Search-time beam width; 0 leaves it to Qdrant (which uses ef_construct)
+HNSW_EF = int(os.environ.get('HNSW_EF', '0'))
+
+# Large upserts are split into batches sent concurrently, at most this many in flight
+QDRANT_UPSERT_BATCH_SIZE = int(os.environ.get('QDRANT_UPSERT_BATCH_SIZE', '256'))
+QDRANT_UPSERT_CONCURRENCY = int(os.environ.get('QDRANT_UPSERT_CONCURRENCY', '4'))
 
-# Multi-language embedding model
-embedding_model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-mpnet-base-v2')
+class EmbeddedQdrantClient:
+    """Async facade over the embedded QdrantClient, whose calls are CPU-bound and synchronous"""
+    
+    def __init__(self, **kwargs):
+        self._client = QdrantClient(**kwargs)
+    
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        # Upserts come from ingestion; everything else must not queue behind embedding batches
+        executor = ingestion_executor if name == "upsert" else query_executor
+        
+        async def call(*args, **kwargs):
+            return await run_in_executor(executor, method, *args, **kwargs)
+        return call
+
+async def open_qdrant_client():
+    """Connect to the Qdrant server, or open embedded storage off the event loop"""
+    # The native async client is only non-blocking against a server; embedded mode runs in the pools
+    if QDRANT_URL:
+        return AsyncQdrantClient(url=QDRANT_URL, api_key=os.environ.get('QDRANT_API_KEY'))
+    # Opening local storage loads every stored vector and payload
+    if QDRANT_PATH == ':memory:':
+        return await run_in_executor(query_executor, EmbeddedQdrantClient, location=":memory:")
+    return await run_in_executor(query_executor, EmbeddedQdrantClient, path=QDRANT_PATH)
+
+# Multi-language embedding model, loaded in the background after startup
+EMBEDDING_MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-mpnet-base-v2'
+EMBEDDING_DIMENSION = 768
+
+# Embedding backend: torch (fp32), onnx (ONNX Runtime fp32) or onnx-int8 (dynamically
+# quantized ONNX). All produce vectors in the same 768-d space as the stored chunks.
+# The int8 file is loaded from the model repository when published there, otherwise
+# exported once into EMBEDDING_ONNX_DIR for the EMBEDDING_ONNX_QUANTIZATION CPU target.
+# The ONNX backends need optimum[onnxruntime] (pip install "sentence-transformers[onnx]").
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch').lower()
+EMBEDDING_ONNX_QUANTIZATION = os.environ.get('EMBEDDING_ONNX_QUANTIZATION', 'avx512_vnni')
+EMBEDDING_ONNX_DIR = os.environ.get('EMBEDDING_ONNX_DIR', str(ROOT_DIR / 'onnx_models'))
+
+# Chunk embeddings are stored in MongoDB as packed little-endian binary of this dtype (float32 or
+# float16) next to an embedding_dtype field; rows written as float arrays by older versions are
+# still read, and migrate_embeddings.py converts them in place
+EMBEDDING_STORAGE_DTYPE = os.environ.get('EMBEDDING_STORAGE_DTYPE', 'float32').lower()
+if EMBEDDING_STORAGE_DTYPE not in ('float32', 'float16'):
+    raise ValueError(f"EMBEDDING_STORAGE_DTYPE must be float32 or float16, got {EMBEDDING_STORAGE_DTYPE}")
+
+# Embedding cache: bounded in-memory LRU, plus a SQLite tier when a directory is configured
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '20000'))
+EMBEDDING_CACHE_DIR = os.environ.get('EMBEDDING_CACHE_DIR')
+
+# Language identification: fastText (fast, batched) with langdetect as fallback.
+# Chunks shorter than LANGUAGE_INHERIT_MIN_CHARS inherit the document language
+LANGUAGE_ID_BACKEND = os.environ.get('LANGUAGE_ID_BACKEND', 'fasttext')
+FASTTEXT_LID_MODEL = os.environ.get('FASTTEXT_LID_MODEL', str(ROOT_DIR / 'models' / 'lid.176.ftz'))
+LANGUAGE_INHERIT_MIN_CHARS = int(os.environ.get('LANGUAGE_INHERIT_MIN_CHARS', '200'))
+LANGUAGE_MIN_CONFIDENCE = float(os.environ.get('LANGUAGE_MIN_CONFIDENCE', '0.8'))
+
+# Hybrid retrieval: BM25 over chunk text fused with dense results (reciprocal rank fusion)
+BM25_K1 = float(os.environ.get('BM25_K1', '1.2'))
+BM25_B = float(os.environ.get('BM25_B', '0.75'))
+RRF_K = int(os.environ.get('RRF_K', '60'))
+# BM25 scores every query term, so stopwords match almost any chunk; hits that only BM25
+# found must also reach this cosine similarity to the query to be returned
+LEXICAL_MIN_SIMILARITY = float(os.environ.get('LEXICAL_MIN_SIMILARITY', '0.15'))
+
+# Optional cross-encoder reranking of over-fetched candidates on CPU
+RERANK_ENABLED = os.environ.get('RERANK_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+RERANKER_MODEL_NAME = os.environ.get('RERANKER_MODEL', 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1')
+RERANK_CANDIDATES = int(os.environ.get('RERANK_CANDIDATES', '20'))
+RERANK_MAX_LATENCY_MS = float(os.environ.get('RERANK_MAX_LATENCY_MS', '300'))
+
+# Query embedding and search result caches (results are invalidated on every index change)
+QUERY_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', '1024'))
+QUERY_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', '600'))
+# Several workers can only share a Qdrant server. Then every change to the index bumps a counter
+# in MongoDB, and each worker compares it before serving cached results, so no worker serves
+# results from before another worker's delete
+SHARED_VECTOR_INDEX = bool(QDRANT_URL) and VECTOR_STORE_BACKEND == 'qdrant'
+
+# Concurrent query encodes are grouped into one forward pass of at most QUERY_BATCH_MAX_SIZE
+# texts; the first query of a batch waits at most QUERY_BATCH_MAX_WAIT_MS for others to join
+QUERY_BATCH_MAX_SIZE = int(os.environ.get('QUERY_BATCH_MAX_SIZE', '32'))
+QUERY_BATCH_MAX_WAIT_MS = float(os.environ.get('QUERY_BATCH_MAX_WAIT_MS', '5'))
 
 # Create FastAPI app
 app = FastAPI()
@@ -82,7 +297,7 @@ class DocumentChunk(BaseModel):
 class Document(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     filename: str
-    content: str
+    content: str = ""  # page text lives in document_chunks; not assembled during ingestion
     page_count: int
     language: str
     file_hash: str
@@ -90,292 +305,2130 @@ class Document(BaseModel):
     processing_status: str = "pending"  # pending, processing, completed, failed
     chunk_count: int = 0
 
+class IngestionProgress(BaseModel):
+    document_id: str
+    status: str = "queued"  # queued, processing, completed, failed, cancelled
+    pages_total: int = 0
+    pages_done: int = 0
+    chunks_done: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    queued_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class SearchFilters(BaseModel):
+    document_ids: Optional[List[str]] = None
+    languages: Optional[List[str]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    
+    def is_empty(self) -> bool:
+        return not (self.document_ids or self.languages) and self.page_from is None and self.page_to is None
+    
+    def cache_key(self) -> tuple:
+        return (
+            tuple(sorted(self.document_ids or ())),
+            tuple(sorted(self.languages or ())),
+            self.page_from,
+            self.page_to
+        )
+
 class QueryRequest(BaseModel):
     query: str
     session_id: str
     max_sources: int = 5
+    retrieval_mode: Literal["hybrid", "dense", "lexical"] = "hybrid"
+    filters: Optional[SearchFilters] = None
 
 class QueryResponse(BaseModel):
-    content: str
+    content: str  # token delta while streaming, full answer when is_complete
     sources: List[Dict[str, Any]]
     confidence: float
     is_complete: bool
+    retrieval_stats: Dict[str, Any] = {}
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and apply NFC normalization for use in cache keys"""
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+EMBEDDING_STORAGE_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+def pack_embedding(vector, dtype: str = EMBEDDING_STORAGE_DTYPE) -> Dict[str, Any]:
+    """MongoDB fields holding a vector as packed binary of the storage dtype"""
+    packed = np.asarray(vector, dtype=EMBEDDING_STORAGE_DTYPES[dtype])
+    return {"embedding": Binary(packed.tobytes()), "embedding_dtype": dtype}
+
+def unpack_embedding(value, dtype: Optional[str]) -> Optional[np.ndarray]:
+    """Read a stored embedding: a zero-copy view of packed binary, or a legacy float array"""
+    if value is None:
+        return None
+    if dtype is None:
+        return np.asarray(value, dtype=np.float32)
+    return np.frombuffer(value, dtype=EMBEDDING_STORAGE_DTYPES[dtype])
+
+def chunk_to_document(chunk: DocumentChunk) -> Dict[str, Any]:
+    """MongoDB row for a chunk with its embedding packed"""
+    row = chunk.model_dump(exclude={"embedding"})
+    if chunk.embedding is not None:
+        row.update(pack_embedding(chunk.embedding))
+    return row
+
+# LLM configuration
+LLM_PROVIDER = "gemini"
+LLM_MODEL = "gemini-2.5-flash"
+RAG_SYSTEM_MESSAGE = """You are an expert document analyst. Answer questions based ONLY on the provided context from uploaded documents. 
+
+If the context doesn't contain enough information, clearly state what's missing.
+Always cite specific sources when making claims.
+For multilingual documents, maintain the language consistency of the user's question.
+Structure your response clearly with relevant details."""
 
 # RAG System Classes
+class BulkWriter:
+    """Buffered MongoDB inserts flushed with insert_many(ordered=False) by size and time"""
+    
+    def __init__(
+        self,
+        collection,
+        max_batch_size: int = BULK_WRITE_BATCH_SIZE,
+        flush_interval: float = BULK_WRITE_FLUSH_INTERVAL
+    ):
+        self.collection = collection
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = flush_interval
+        self.inserted_count = 0
+        self.failed: List[Dict[str, Any]] = []
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
+    
+    async def add(self, document: Dict[str, Any]):
+        """Buffer a document, flushing when the batch is full or the interval has elapsed"""
+        self._buffer.append(document)
+        if (len(self._buffer) >= self.max_batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            await self.flush()
+    
+    async def flush(self):
+        """Write buffered documents; per-row failures are recorded, the rest of the batch is kept"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        
+        batch, self._buffer = self._buffer, []
+        try:
+            result = await self.collection.insert_many(batch, ordered=False)
+            self.inserted_count += len(result.inserted_ids)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            self.inserted_count += e.details.get("nInserted", 0)
+            for error in write_errors:
+                self.failed.append({
+                    "id": batch[error["index"]].get("id"),
+                    "code": error.get("code"),
+                    "error": error.get("errmsg")
+                })
+            logging.error(
+                f"Bulk write to {self.collection.name}: {len(write_errors)} of {len(batch)} rows failed, "
+                f"first error: {write_errors[0].get('errmsg') if write_errors else 'unknown'}"
+            )
+
+class EmbeddingModel:
+    """Sentence-transformer loaded on demand, with a warm-up encode before it reports ready"""
+    
+    BACKENDS = ("torch", "onnx", "onnx-int8")
+    
+    def __init__(self, model_name: str, backend: str = EMBEDDING_BACKEND):
+        if backend not in self.BACKENDS:
+            logging.error(f"Unknown EMBEDDING_BACKEND '{backend}', using torch")
+            backend = "torch"
+        self.model_name = model_name
+        self.backend = backend
+        self.state = "not_loaded"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._model = None
+        self._lock = threading.Lock()
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+    
+    @property
+    def cache_id(self) -> str:
+        """Identifies the vectors this model produces; quantized backends differ slightly from fp32"""
+        return self.model_name if self.backend == "torch" else f"{self.model_name}#{self.backend}"
+    
+    def load(self):
+        """Import, load and warm up the model once (blocking); concurrent callers wait for the first"""
+        with self._lock:
+            if self._model is not None:
+                return self._model
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                model = self._create_model()
+                apply_intra_op_threads()
+                # The first forward pass allocates buffers and is several times slower than later ones
+                model.encode(["warm-up"], batch_size=1)
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                raise
+            self._model = model
+            self.load_seconds = time.perf_counter() - started
+            self.state = "ready"
+            self.error = None
+            logging.info(f"Loaded embedding model {self.model_name} ({self.backend}) in {self.load_seconds:.2f}s")
+            return model
+    
+    def _create_model(self):
+        # Deferred so importing this module does not pull in torch or onnxruntime
+        from sentence_transformers import SentenceTransformer
+        if self.backend == "torch":
+            return SentenceTransformer(self.model_name, device="cpu")
+        if self.backend == "onnx":
+            return SentenceTransformer(self.model_name, device="cpu", backend="onnx")
+        
+        file_name = f"onnx/model_qint8_{EMBEDDING_ONNX_QUANTIZATION}.onnx"
+        try:
+            return SentenceTransformer(
+                self.model_name, device="cpu", backend="onnx", model_kwargs={"file_name": file_name}
+            )
+        except Exception as e:
+            logging.info(f"No published {file_name} for {self.model_name} ({e}), exporting locally")
+        
+        export_dir = Path(EMBEDDING_ONNX_DIR) / self.model_name.replace("/", "__")
+        if not (export_dir / file_name).exists():
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            onnx_model = SentenceTransformer(self.model_name, device="cpu", backend="onnx")
+            onnx_model.save_pretrained(str(export_dir))
+            export_dynamic_quantized_onnx_model(onnx_model, EMBEDDING_ONNX_QUANTIZATION, str(export_dir))
+        return SentenceTransformer(
+            str(export_dir), device="cpu", backend="onnx", model_kwargs={"file_name": file_name}
+        )
+    
+    def encode(self, texts: List[str], **kwargs):
+        model = self.load()
+        apply_intra_op_threads()
+        return model.encode(texts, **kwargs)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.model_name,
+            "backend": self.backend,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
+
+class EmbeddingCache:
+    """Content-addressed embedding cache keyed by model name and normalized text"""
+    
+    _DISK_LOOKUP_BATCH = 500
+    
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = EMBEDDING_CACHE_SIZE,
+        cache_dir: Optional[str] = EMBEDDING_CACHE_DIR
+    ):
+        self.model_name = model_name
+        self.max_entries = max(0, max_entries)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(str(Path(cache_dir) / "embeddings.sqlite3"), check_same_thread=False)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._disk.commit()
+    
+    def key(self, text: str) -> str:
+        """Hash of the model name and whitespace/Unicode-normalized text"""
+        return hashlib.sha256(f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+    
+    def encode(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Return embeddings for texts, running the model only on cache misses (blocking)"""
+        keys = [self.key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[i] = vector
+                    self.hits += 1
+        
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self._disk is not None:
+            found = self._disk_get({keys[i] for i in missing})
+            for i in missing:
+                if keys[i] in found:
+                    vectors[i] = found[keys[i]]
+            if found:
+                with self._lock:
+                    self.disk_hits += sum(1 for i in missing if keys[i] in found)
+                    self._remember(found)
+            missing = [i for i in missing if vectors[i] is None]
+        
+        if missing:
+            # Encode each distinct text once, even if it repeats within the batch
+            unique: Dict[str, int] = {}
+            for i in missing:
+                unique.setdefault(keys[i], i)
+            encoded = embedding_model.encode([texts[i] for i in unique.values()], batch_size=batch_size)
+            new_vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(unique, encoded)}
+            
+            with self._lock:
+                self.misses += len(unique)
+                self.hits += len(missing) - len(unique)
+                self._remember(new_vectors)
+            self._disk_put(new_vectors)
+            
+            for i in missing:
+                vectors[i] = new_vectors[keys[i]]
+        
+        return [vector.tolist() for vector in vectors]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "disk_enabled": self._disk is not None
+        }
+    
+    def _remember(self, vectors: Dict[str, np.ndarray]):
+        """Insert into the LRU tier, evicting the least recently used entries (lock held)"""
+        if not self.max_entries:
+            return
+        for key, vector in vectors.items():
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _disk_get(self, keys: set) -> Dict[str, np.ndarray]:
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for start in range(0, len(keys), self._DISK_LOOKUP_BATCH):
+                batch = keys[start:start + self._DISK_LOOKUP_BATCH]
+                rows = self._disk.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+    
+    def _disk_put(self, vectors: Dict[str, np.ndarray]):
+        if self._disk is None or not vectors:
+            return
+        with self._lock:
+            self._disk.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in vectors.items()]
+            )
+            self._disk.commit()
+
+class QueryEncoderBatcher:
+    """Micro-batches concurrent query encodes into single embedding calls"""
+    
+    def __init__(self, max_batch_size: int = QUERY_BATCH_MAX_SIZE, max_wait_ms: float = QUERY_BATCH_MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batches = 0
+        self.queries = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def encode(self, text: str) -> List[float]:
+        """Embed one query; resolves when the batch it joined has been encoded"""
+        if self._task is None or self._task.done():
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued, then wait out the rest of the window
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            
+            # Callers that gave up (e.g. client disconnects) are not encoded
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                vectors = await run_in_executor(
+                    query_executor, embedding_cache.encode, [text for text, _ in batch], len(batch)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+    
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on invalidate() so results computed before an index change are not stored
+        self.generation = 0
+        # Last counter seen from other processes sharing the cached data (see sync)
+        self._shared_generation: Optional[int] = None
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value, generation: Optional[int] = None):
+        """Store a value; skipped if the cache was invalidated since `generation` was read"""
+        with self._lock:
+            if not self.max_entries or (generation is not None and generation != self.generation):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        """Drop every entry"""
+        with self._lock:
+            self._invalidate()
+    
+    def sync(self, shared_generation: int):
+        """Drop every entry if another process changed the cached data since the last sync"""
+        with self._lock:
+            if shared_generation != self._shared_generation:
+                if self._shared_generation is not None:
+                    self._invalidate()
+                self._shared_generation = shared_generation
+    
+    def _invalidate(self):
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
+
+class LanguageIdentifier(ABC):
+    """Batched language identification; backends implement predict_batch"""
+    
+    name = "base"
+    
+    @abstractmethod
+    def predict_batch(self, texts: List[str]) -> List[tuple]:
+        """Return (language code or None, confidence) per text"""
+    
+    def detect(self, text: str, default: str = 'en') -> str:
+        """Detect the language of a single sample"""
+        language, _ = self.predict_batch([text])[0]
+        return language or default
+    
+    def detect_chunks(self, texts: List[str], document_language: str) -> List[str]:
+        """Chunks inherit the document language unless long and confident enough to disagree"""
+        languages = [document_language] * len(texts)
+        candidates = [i for i, text in enumerate(texts) if len(text) >= LANGUAGE_INHERIT_MIN_CHARS]
+        if candidates:
+            predictions = self.predict_batch([texts[i] for i in candidates])
+            for i, (language, confidence) in zip(candidates, predictions):
+                if language and confidence >= LANGUAGE_MIN_CONFIDENCE:
+                    languages[i] = language
+        return languages
+
+class LangdetectIdentifier(LanguageIdentifier):
+    """langdetect, seeded so results are reproducible"""
+    
+    name = "langdetect"
+    
+    def __init__(self):
+        DetectorFactory.seed = 0
+    
+    def predict_batch(self, texts: List[str]) -> List[tuple]:
+        results = []
+        for text in texts:
+            try:
+                best = detect_langs(text)[0]
+                results.append((best.lang, best.prob))
+            except LangDetectException:
+                results.append((None, 0.0))
+        return results
+
+class FastTextIdentifier(LanguageIdentifier):
+    """fastText lid.176 model; one native call per batch"""
+    
+    name = "fasttext"
+    
+    def __init__(self, model_path: str = FASTTEXT_LID_MODEL):
+        import fasttext
+        self.model = fasttext.load_model(model_path)
+    
+    def predict_batch(self, texts: List[str]) -> List[tuple]:
+        if not texts:
+            return []
+        # fastText predicts one line per text
+        labels, probabilities = self.model.predict([" ".join(text.split()) for text in texts], k=1)
+        return [
+            (label[0].replace("__label__", "") if label else None, float(probability[0]) if len(probability) else 0.0)
+            for label, probability in zip(labels, probabilities)
+        ]
+
+def create_language_identifier(backend: str = LANGUAGE_ID_BACKEND) -> LanguageIdentifier:
+    """Build the configured backend, falling back to langdetect when fastText is unavailable"""
+    if backend == "fasttext":
+        try:
+            return FastTextIdentifier()
+        except (ImportError, ValueError, OSError) as e:
+            logging.warning(f"fastText language identification unavailable ({e}), using langdetect")
+    return LangdetectIdentifier()
+
+class BM25Index:
+    """Incrementally maintained in-memory BM25 inverted index over chunk text"""
+    
+    TOKEN_PATTERN = re.compile(r"\w+(?:[-./:]\w+)*")
+    
+    def __init__(
+        self,
+        k1: float = BM25_K1,
+        b: float = BM25_B
+    ):
+        self.k1 = k1
+        self.b = b
+        # term -> (slots, term frequencies) as compact append-only arrays
+        self._postings: Dict[str, tuple] = {}
+        # Largest term frequency per term and shortest chunk ever indexed; never lowered on
+        # removal, so they stay valid for the score upper bounds used in pruning
+        self._max_tfs: Dict[str, int] = {}
+        self._min_length = 0
+        self._slots: Dict[str, int] = {}
+        self._chunk_ids: List[Optional[str]] = []
+        self._lengths = array('I')
+        self._alive = bytearray()
+        self._document_slots: Dict[str, List[int]] = {}
+        # Per-slot page numbers and interned language codes for filtered search
+        self._pages = array('i')
+        self._language_codes = array('H')
+        self._languages: Dict[str, int] = {}
+        self._live_count = 0
+        self._dead_count = 0
+        self._total_length = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Lowercased word tokens; identifiers like "E-1234" also yield their parts"""
+        tokens = []
+        for token in cls.TOKEN_PATTERN.findall(text.lower()):
+            tokens.append(token)
+            if not token.isalnum():
+                tokens.extend(part for part in re.split(r"[-./:]", token) if part)
+        return [token for token in tokens if len(token) > 1]
+    
+    def __len__(self) -> int:
+        return self._live_count
+    
+    def add(self, chunks: List[tuple]):
+        """Index (chunk_id, document_id, text, page_number, language) tuples; already indexed chunk IDs are skipped"""
+        tokenized = [
+            (chunk_id, document_id, Counter(self.tokenize(text)), page_number, language)
+            for chunk_id, document_id, text, page_number, language in chunks
+        ]
+        with self._lock:
+            for chunk_id, document_id, term_counts, page_number, language in tokenized:
+                if chunk_id in self._slots:
+                    continue
+                slot = len(self._chunk_ids)
+                self._slots[chunk_id] = slot
+                self._chunk_ids.append(chunk_id)
+                self._document_slots.setdefault(document_id, []).append(slot)
+                self._pages.append(page_number or 0)
+                self._language_codes.append(self._languages.setdefault(language or "", len(self._languages)))
+                length = sum(term_counts.values())
+                self._lengths.append(length)
+                self._min_length = length if slot == 0 else min(self._min_length, length)
+                self._alive.append(1)
+                self._total_length += length
+                self._live_count += 1
+                for term, count in term_counts.items():
+                    posting = self._postings.get(term)
+                    if posting is None:
+                        posting = self._postings[term] = (array('I'), array('H'))
+                    posting[0].append(slot)
+                    posting[1].append(min(count, 65535))
+                    if count > self._max_tfs.get(term, 0):
+                        self._max_tfs[term] = min(count, 65535)
+    
+    def remove(self, chunk_ids: List[str]):
+        """Tombstone chunks by ID"""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                slot = self._slots.pop(chunk_id, None)
+                if slot is not None:
+                    self._tombstone(slot)
+            self._maybe_compact()
+    
+    def remove_document(self, document_id: str):
+        """Tombstone every chunk of a document"""
+        with self._lock:
+            for slot in self._document_slots.pop(document_id, []):
+                chunk_id = self._chunk_ids[slot]
+                if chunk_id is not None and self._slots.pop(chunk_id, None) is not None:
+                    self._tombstone(slot)
+            self._maybe_compact()
+    
+    def search(self, query: str, limit: int = 10, filters: Optional[SearchFilters] = None) -> List[tuple]:
+        """Return up to `limit` (chunk_id, score) pairs, best first, restricted to chunks matching `filters`"""
+        terms = set(self.tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        with self._lock:
+            # Views on the index arrays must not outlive the lock
+            return self._score(terms, limit, filters)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": self._live_count,
+            "tombstoned": self._dead_count,
+            "terms": len(self._postings)
+        }
+    
+    def _filter_mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """Boolean mask over slots matching `filters`, or None when nothing is filtered (lock held)"""
+        if filters is None or filters.is_empty():
+            return None
+        mask = np.ones(len(self._chunk_ids), dtype=np.bool_)
+        if filters.document_ids:
+            document_mask = np.zeros_like(mask)
+            for document_id in filters.document_ids:
+                document_mask[self._document_slots.get(document_id, [])] = True
+            mask &= document_mask
+        if filters.languages:
+            codes = [self._languages[language] for language in filters.languages if language in self._languages]
+            mask &= np.isin(np.frombuffer(self._language_codes, dtype=np.uint16), codes)
+        if filters.page_from is not None or filters.page_to is not None:
+            pages = np.frombuffer(self._pages, dtype=np.int32)
+            if filters.page_from is not None:
+                mask &= pages >= filters.page_from
+            if filters.page_to is not None:
+                mask &= pages <= filters.page_to
+            del pages
+        return mask
+    
+    def _score(self, terms: set, limit: int, filters: Optional[SearchFilters] = None) -> List[tuple]:
+        """Exact top-k BM25 over all query terms with MaxScore pruning (lock held)"""
+        if not self._live_count:
+            return []
+        alive = np.frombuffer(self._alive, dtype=np.uint8).view(np.bool_)
+        allowed = self._filter_mask(filters)
+        if allowed is not None and not allowed.any():
+            return []
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        average_length = self._total_length / self._live_count
+        
+        # Posting lengths stand in for document frequency (tombstones count until compaction);
+        # terms are visited rarest first so the long postings of common terms come last
+        terms = sorted((term for term in terms if term in self._postings), key=lambda term: len(self._postings[term][0]))
+        if not terms:
+            return []
+        postings = [self._postings[term] for term in terms]
+        document_frequencies = [min(len(slots), self._live_count) for slots, _ in postings]
+        idfs = [
+            float(np.log(1.0 + (self._live_count - df + 0.5) / (df + 0.5)))
+            for df in document_frequencies
+        ]
+        # A term scores highest at its largest frequency in the shortest chunk;
+        # remaining_bounds[i] is the best score a chunk can get from terms i and later
+        shortest_norm = self.k1 * (1.0 - self.b + self.b * self._min_length / average_length)
+        bounds = [
+            idf * self._max_tfs[term] * (self.k1 + 1.0) / (self._max_tfs[term] + shortest_norm)
+            for term, idf in zip(terms, idfs)
+        ]
+        remaining_bounds = np.cumsum(bounds[::-1])[::-1].tolist() + [0.0]
+        
+        # Essential terms are scored over their whole posting, until the k-th best partial score
+        # is out of reach for a chunk that only contains the remaining terms
+        candidates = scores = None  # sorted slots of chunks seen so far and their partial scores
+        accumulator = touched = None  # dense scores, only needed once a second essential term arrives
+        first_pruned = len(postings)
+        for i, ((slot_array, tf_array), idf) in enumerate(zip(postings, idfs)):
+            slots = np.frombuffer(slot_array, dtype=np.uint32)
+            tfs = np.frombuffer(tf_array, dtype=np.uint16)
+            if self._dead_count or allowed is not None:
+                keep = alive[slots]
+                if allowed is not None:
+                    keep &= allowed[slots]
+                slots = slots[keep]
+                tfs = tfs[keep]
+            term_scores = self._term_scores(slots, tfs, lengths, idf, average_length)
+            if candidates is None:
+                candidates, scores = slots, term_scores
+            else:
+                if accumulator is None:
+                    accumulator = np.zeros(len(self._chunk_ids), dtype=np.float32)
+                    touched = np.zeros(len(self._chunk_ids), dtype=np.bool_)
+                    accumulator[candidates] = scores
+                    touched[candidates] = True
+                # Slots are unique within a posting, so fancy-index addition is safe
+                accumulator[slots] += term_scores
+                touched[slots] = True
+                candidates = np.flatnonzero(touched)
+                scores = accumulator[candidates]
+            if i + 1 < len(postings) and len(candidates) >= limit:
+                if np.partition(scores, len(scores) - limit)[len(scores) - limit] >= remaining_bounds[i + 1]:
+                    first_pruned = i + 1
+                    break
+        
+        # The remaining terms only update candidates, dropping those that can no longer reach
+        # the k-th score; postings and candidates are both sorted, so lookups are binary searches
+        for i in range(first_pruned, len(postings)):
+            threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            keep = scores + np.float32(remaining_bounds[i]) >= threshold
+            candidates, scores = candidates[keep], scores[keep]
+            slots = np.frombuffer(postings[i][0], dtype=np.uint32)
+            tfs = np.frombuffer(postings[i][1], dtype=np.uint16)
+            if len(slots) > len(candidates):
+                positions = np.searchsorted(slots, candidates)
+                found = positions < len(slots)
+                found[found] = slots[positions[found]] == candidates[found]
+                scores[found] += self._term_scores(
+                    candidates[found], tfs[positions[found]], lengths, idfs[i], average_length
+                )
+            else:
+                positions = np.searchsorted(candidates, slots)
+                found = positions < len(candidates)
+                found[found] = candidates[positions[found]] == slots[found]
+                scores[positions[found]] += self._term_scores(
+                    slots[found], tfs[found], lengths, idfs[i], average_length
+                )
+        
+        if not len(candidates):
+            return []
+        slots = candidates
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._chunk_ids[int(slots[i])], float(scores[i])) for i in top]
+    
+    def _term_scores(
+        self,
+        slots: np.ndarray,
+        tfs: np.ndarray,
+        lengths: np.ndarray,
+        idf: float,
+        average_length: float
+    ) -> np.ndarray:
+        """BM25 contribution of one term to the given chunks, computed in place in float32"""
+        tfs = tfs.astype(np.float32)
+        scores = lengths[slots].astype(np.float32)
+        scores *= np.float32(self.k1 * self.b / average_length)
+        scores += np.float32(self.k1 * (1.0 - self.b))
+        scores += tfs
+        np.divide(tfs, scores, out=scores)
+        scores *= np.float32(idf * (self.k1 + 1.0))
+        return scores
+    
+    def _tombstone(self, slot: int):
+        self._alive[slot] = 0
+        self._chunk_ids[slot] = None
+        self._total_length -= self._lengths[slot]
+        self._live_count -= 1
+        self._dead_count += 1
+    
+    def _maybe_compact(self):
+        """Drop tombstoned postings once they make up a large share of the index (lock held)"""
+        if self._dead_count < 10000 or self._dead_count < self._live_count:
+            return
+        alive = np.frombuffer(self._alive, dtype=np.uint8).view(np.bool_)
+        compacted = {}
+        for term, (slots, tfs) in self._postings.items():
+            slot_view = np.frombuffer(slots, dtype=np.uint32)
+            live = alive[slot_view]
+            if live.any():
+                compacted[term] = (
+                    array('I', slot_view[live].tobytes()),
+                    array('H', np.frombuffer(tfs, dtype=np.uint16)[live].tobytes())
+                )
+            del slot_view
+        del alive
+        self._postings = compacted
+        self._max_tfs = {term: tf for term, tf in self._max_tfs.items() if term in compacted}
+        self._dead_count = 0
+
 class AdvancedPDFProcessor:
     """Advanced PDF processing with multilingual support"""
     
-    async def process_pdf(self, file_content: bytes, filename: str) -> Document:
-        """Process PDF and extract text content"""
+    async def process_pdf(self, file_path: str, file_hash: str, filename: str) -> Document:
+        """Register a spooled PDF and queue it for ingestion; takes ownership of file_path"""
+        queued = False
         try:
-            # Create document hash
-            file_hash = hashlib.md5(file_content).hexdigest()
-            
             # Check if already processed
             existing_doc = await db.documents.find_one({"file_hash": file_hash})
             if existing_doc:
                 return Document(**existing_doc)
             
-            # Extract text from PDF
-            pdf_doc = fitz.open(stream=file_content, filetype="pdf")
-            full_text = ""
-            page_count = len(pdf_doc)
-            
-            for page_num in range(page_count):
-                page = pdf_doc[page_num]
-                text = page.get_text()
-                full_text += f"[Page {page_num + 1}]\n{text}\n\n"
+            # Reject early instead of parsing a PDF we cannot queue
+            if not ingestion_queue.has_capacity():
+                raise HTTPException(
+                    status_code=429,
+                    detail="Ingestion queue is full, please retry later",
+                    headers={"Retry-After": "30"}
+                )
             
-            # Detect language
-            try:
-                language = detect(full_text[:1000])  # Sample first 1000 chars
-            except:
-                language = 'en'
+            # Count pages and detect language from the first pages off the event loop;
+            # the full text is extracted page-window by page-window in the ingestion job
+            page_count = await run_in_executor(ingestion_executor, pdf_page_count, file_path)
+            sample_pages = await run_in_executor(
+                ingestion_executor, extract_page_range, file_path, 0, min(page_count, 3)
+            )
+            language = await run_in_executor(
+                ingestion_executor, language_identifier.detect, "\n".join(sample_pages)[:1000]
+            )
             
             # Create document record
             document = Document(
                 filename=filename,
-                content=full_text,
                 page_count=page_count,
                 language=language,
                 file_hash=file_hash,
                 processing_status="processing"
             )
             
-            # Save to MongoDB
-            await db.documents.insert_one(document.model_dump())
+            # Save to MongoDB; a concurrent upload of the same file wins the unique file_hash index
+            try:
+                await db.documents.insert_one(document.model_dump())
+            except DuplicateKeyError:
+                existing_doc = await db.documents.find_one({"file_hash": file_hash})
+                if existing_doc is None:
+                    raise
+                return Document(**existing_doc)
             
-            # Process chunks in background
-            asyncio.create_task(self._process_chunks(document))
+            # Queue chunking and embedding for the ingestion workers
+            try:
+                ingestion_queue.submit(document, file_path)
+                queued = True
+            except IngestionQueueFull:
+                await db.documents.delete_one({"id": document.id})
+                raise HTTPException(
+                    status_code=503,
+                    detail="Ingestion queue is full, please retry later",
+                    headers={"Retry-After": "30"}
+                )
             
             return document
             
+        except HTTPException:
+            raise
         except Exception as e:
             logging.error(f"PDF processing error: {e}")
             raise HTTPException(status_code=500, detail=f"PDF processing failed: {str(e)}")
+        finally:
+            # Duplicates and rejected uploads never reach a worker
+            if not queued:
+                os.unlink(file_path)
+    
+    async def _iter_pages(self, file_path: str, page_count: int) -> AsyncGenerator[tuple, None]:
+        """Yield (page_number, text) in page order, extracting the next window while the current one is consumed"""
+        def extract_window(start: int) -> asyncio.Future:
+            return asyncio.ensure_future(
+                self._extract_pages(file_path, start, min(start + PDF_PAGE_WINDOW, page_count))
+            )
+        
+        next_window = extract_window(0) if page_count else None
+        start = 0
+        try:
+            while next_window is not None:
+                texts = await next_window
+                following = start + PDF_PAGE_WINDOW
+                next_window = extract_window(following) if following < page_count else None
+                for offset, text in enumerate(texts):
+                    yield start + offset + 1, text
+                start = following
+        finally:
+            if next_window is not None:
+                next_window.cancel()
+    
+    async def _extract_pages(self, file_path: str, start: int, stop: int) -> List[str]:
+        """Extract texts of pages [start, stop) in page order, in parallel across processes for large ranges"""
+        started = time.perf_counter()
+        page_count = stop - start
+        if (PDF_EXTRACTION_MODE != "parallel"
+                or PDF_EXTRACTION_PROCESSES < 2
+                or page_count < PDF_PARALLEL_MIN_PAGES):
+            pages = await run_in_executor(ingestion_executor, extract_page_range, file_path, start, stop)
+        else:
+            # Several ranges per process balance pages of uneven cost
+            loop = asyncio.get_running_loop()
+            executor = get_extraction_executor()
+            ranges = split_page_range(page_count, PDF_EXTRACTION_PROCESSES * 4, PDF_PAGES_PER_TASK)
+            results = await asyncio.gather(*(
+                loop.run_in_executor(executor, extract_page_range, file_path, start + range_start, start + range_stop)
+                for range_start, range_stop in ranges
+            ))
+            pages = [text for texts in results for text in texts]
+        
+        elapsed = time.perf_counter() - started
+        logging.info(
+            f"Extracted pages {start + 1}-{stop} in {elapsed:.2f}s ({page_count / max(elapsed, 1e-9):.1f} pages/s)"
+        )
+        return pages
+    
+    async def _process_chunks(
+        self,
+        document: Document,
+        file_path: str,
+        progress: Optional[IngestionProgress] = None
+    ) -> int:
+        """Stream pages through chunking, embedding and storage in bounded batches; raises on failure"""
+        started = time.perf_counter()
+        chunker = SemanticChunker()
+        chunk_count = 0
+        
+        async with BulkWriter(db.document_chunks) as writer:
+            pages = self._iter_pages(file_path, document.page_count)
+            async for chunks in chunker.create_chunks(pages, document.id, document.language, progress):
+                # A document deleted mid-ingestion stops before its next batch is written
+                if document.id in deleting_documents:
+                    raise IngestionCancelled(f"Document {document.id} was deleted during ingestion")
+                for chunk in chunks:
+                    await writer.add(chunk_to_document(chunk))
+                
+                # Each batch is searchable as soon as it is upserted
+                await vector_store.store_chunks(chunks)
+                chunk_count += len(chunks)
+                if progress is not None:
+                    progress.chunks_done = chunk_count
+        
+        if writer.failed:
+            # Keep the index consistent with the rows that were actually stored
+            logging.error(
+                f"{len(writer.failed)} of {chunk_count} chunks failed to store for document {document.id}: "
+                f"{[failure['id'] for failure in writer.failed]}"
+            )
+            await vector_store.delete_points([failure["id"] for failure in writer.failed])
+            chunk_count -= len(writer.failed)
+        
+        # Update document status
+        await db.documents.update_one(
+            {"id": document.id},
+            {"$set": {"processing_status": "completed", "chunk_count": chunk_count}}
+        )
+        
+        elapsed = time.perf_counter() - started
+        logging.info(
+            f"Ingested {document.page_count} pages into {chunk_count} chunks in {elapsed:.2f}s "
+            f"({chunk_count / max(elapsed, 1e-9):.1f} chunks/s)"
+        )
+        return chunk_count
+    
+    async def _discard_chunks(self, document_id: str):
+        """Remove chunks and vectors left behind by a failed attempt"""
+        await db.document_chunks.delete_many({"document_id": document_id})
+        await vector_store.delete_document_points(document_id)
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue has reached its maximum depth"""
+
+class IngestionCancelled(Exception):
+    """Raised when a document is deleted while its ingestion job is running"""
+
+class IngestionQueue:
+    """Bounded queue of chunking/embedding jobs drained by a fixed number of workers"""
+    
+    def __init__(
+        self,
+        processor: AdvancedPDFProcessor,
+        worker_count: int = INGESTION_QUEUE_WORKERS,
+        max_depth: int = INGESTION_QUEUE_MAX_DEPTH,
+        max_retries: int = INGESTION_MAX_RETRIES
+    ):
+        self.processor = processor
+        self.worker_count = max(1, worker_count)
+        self.max_depth = max(1, max_depth)
+        self.max_retries = max(0, max_retries)
+        self.jobs: "OrderedDict[str, IngestionProgress]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._cancelled: set = set()
+        self._running: Dict[str, asyncio.Event] = {}
+    
+    def start(self):
+        """Create the queue and worker tasks on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+    
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    def has_capacity(self) -> bool:
+        return self._queue is not None and not self._queue.full()
+    
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    def submit(self, document: Document, file_path: str) -> IngestionProgress:
+        """Enqueue a spooled document; the job deletes file_path when it finishes. Raises IngestionQueueFull"""
+        if self._queue is None:
+            raise IngestionQueueFull("Ingestion queue is not running")
+        
+        progress = IngestionProgress(document_id=document.id, pages_total=document.page_count)
+        try:
+            self._queue.put_nowait((document, file_path, progress))
+        except asyncio.QueueFull:
+            raise IngestionQueueFull(f"Ingestion queue is full ({self.max_depth} jobs)")
+        
+        self.jobs[document.id] = progress
+        self._prune_history()
+        return progress
+    
+    def cancel(self, document_id: str):
+        """Skip a queued job for a document being deleted; a running job stops at its next batch"""
+        job = self.jobs.get(document_id)
+        if job is not None and job.status == "queued":
+            self._cancelled.add(document_id)
+    
+    async def wait_stopped(self, document_id: str):
+        """Wait until a running job for the document has finished and discarded any partial writes"""
+        stopped = self._running.get(document_id)
+        if stopped is not None:
+            await stopped.wait()
+    
+    async def _worker(self):
+        while True:
+            document, file_path, progress = await self._queue.get()
+            try:
+                if document.id in self._cancelled:
+                    progress.status = "cancelled"
+                    progress.finished_at = datetime.utcnow()
+                else:
+                    self._running[document.id] = asyncio.Event()
+                    await self._run(document, file_path, progress)
+            finally:
+                self._cancelled.discard(document.id)
+                stopped = self._running.pop(document.id, None)
+                if stopped is not None:
+                    stopped.set()
+                self._queue.task_done()
+                try:
+                    os.unlink(file_path)
+                except OSError as e:
+                    logging.error(f"Failed to remove spooled upload {file_path}: {e}")
+    
+    async def _run(self, document: Document, file_path: str, progress: IngestionProgress):
+        """Run a job, retrying with exponential backoff before marking the document failed"""
+        while True:
+            progress.attempts += 1
+            progress.status = "processing"
+            progress.started_at = datetime.utcnow()
+            try:
+                if document.id in deleting_documents:
+                    raise IngestionCancelled(f"Document {document.id} was deleted before ingestion")
+                chunk_count = await self.processor._process_chunks(document, file_path, progress)
+                progress.chunks_done = chunk_count
+                progress.status = "completed"
+                progress.finished_at = datetime.utcnow()
+                return
+            except asyncio.CancelledError:
+                raise
+            except IngestionCancelled as e:
+                logging.info(f"{e}; discarding {progress.chunks_done} stored chunks")
+                progress.status = "cancelled"
+                progress.finished_at = datetime.utcnow()
+                try:
+                    await self.processor._discard_chunks(document.id)
+                except Exception as cleanup_error:
+                    # purge_document removes whatever is left once the job has stopped
+                    logging.error(f"Failed to discard partial chunks for {document.id}: {cleanup_error}")
+                return
+            except Exception as e:
+                logging.error(f"Chunk processing error for {document.id} (attempt {progress.attempts}): {e}")
+                progress.error = str(e)
+                try:
+                    await self.processor._discard_chunks(document.id)
+                except Exception as cleanup_error:
+                    logging.error(f"Failed to discard partial chunks for {document.id}: {cleanup_error}")
+                
+                if progress.attempts > self.max_retries:
+                    progress.status = "failed"
+                    progress.finished_at = datetime.utcnow()
+                    await db.documents.update_one(
+                        {"id": document.id},
+                        {"$set": {"processing_status": "failed"}}
+                    )
+                    return
+                
+                progress.pages_done = 0
+                progress.chunks_done = 0
+                await asyncio.sleep(2 ** progress.attempts)
+    
+    def _prune_history(self):
+        """Forget the oldest finished jobs beyond INGESTION_JOB_HISTORY"""
+        excess = len(self.jobs) - INGESTION_JOB_HISTORY
+        if excess <= 0:
+            return
+        for document_id in [
+            document_id for document_id, job in self.jobs.items()
+            if job.status in ("completed", "failed", "cancelled")
+        ][:excess]:
+            del self.jobs[document_id]
+
+class SemanticChunker:
+    """Advanced chunking with semantic awareness"""
+    
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+    
+    async def create_chunks(
+        self,
+        pages: AsyncIterator[tuple],
+        document_id: str,
+        document_language: str,
+        progress: Optional[IngestionProgress] = None
+    ) -> AsyncGenerator[List[DocumentChunk], None]:
+        """Turn a stream of (page_number, text) into batches of embedded chunks"""
+        pending: List[tuple] = []
+        chunk_index = 0
+        
+        async for page_number, text in pages:
+            pending.extend((page_number, paragraph) for paragraph in self.split_paragraphs(text))
+            if progress is not None:
+                progress.pages_done = page_number
+            
+            while len(pending) >= self.batch_size:
+                batch, pending = pending[:self.batch_size], pending[self.batch_size:]
+                # Language detection and encoding are CPU-bound
+                yield await run_in_executor(
+                    ingestion_executor, self._build_chunks, batch, document_id, document_language, chunk_index
+                )
+                chunk_index += len(batch)
+        
+        if pending:
+            yield await run_in_executor(
+                ingestion_executor, self._build_chunks, pending, document_id, document_language, chunk_index
+            )
+    
+    def split_paragraphs(self, text: str) -> List[str]:
+        """Split page text into semantic chunks (paragraphs)"""
+        return [p.strip() for p in text.split('\n\n') if len(p.strip()) > 50]
+    
+    def _build_chunks(
+        self,
+        batch: List[tuple],
+        document_id: str,
+        document_language: str,
+        first_index: int
+    ) -> List[DocumentChunk]:
+        """Detect language and embed a batch of (page_number, paragraph) pairs (blocking)"""
+        paragraphs = [paragraph for _, paragraph in batch]
+        languages = language_identifier.detect_chunks(paragraphs, document_language)
+        chunks = [
+            DocumentChunk(
+                document_id=document_id,
+                text=paragraph,
+                page_number=page_number,
+                chunk_index=first_index + offset,
+                language=language
+            )
+            for offset, ((page_number, paragraph), language) in enumerate(zip(batch, languages))
+        ]
+        
+        for chunk, embedding in zip(chunks, self._encode_batch([chunk.text for chunk in chunks])):
+            chunk.embedding = embedding
+        return chunks
+    
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """Encode one batch of texts, logging its throughput"""
+        started = time.perf_counter()
+        embeddings = embedding_cache.encode(texts, batch_size=self.batch_size)
+        elapsed = time.perf_counter() - started
+        logging.info(
+            f"Embedded batch of {len(texts)} chunks in {elapsed:.3f}s "
+            f"({len(texts) / max(elapsed, 1e-9):.1f} chunks/s, batch_size={self.batch_size})"
+        )
+        return embeddings
+
+class VectorStore(ABC):
+    """Chunk vector index shared by ingestion, search and deletion; backends implement the storage primitives"""
+    
+    async def initialize(self):
+        """Open backend storage; called by the background startup task (or the first call to arrive)"""
+    
+    async def close(self):
+        """Release backend storage at shutdown"""
+    
+    @abstractmethod
+    async def upsert(self, entries: List[tuple]):
+        """Insert or replace (chunk_id, vector, payload) entries"""
+    
+    @abstractmethod
+    async def delete(self, point_ids: List[str]):
+        """Delete vectors by chunk ID"""
+    
+    @abstractmethod
+    async def delete_by_document(self, document_id: str):
+        """Delete every vector belonging to a document"""
+    
+    @abstractmethod
+    async def count(self, document_id: Optional[str] = None) -> int:
+        """Count stored vectors, optionally only those of one document"""
+    
+    @abstractmethod
+    async def query(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[SearchFilters] = None,
+        hidden_documents: Optional[List[str]] = None
+    ) -> List[tuple]:
+        """Return up to `limit` (chunk_id, cosine similarity, payload) tuples, best first, skipping hidden documents"""
+    
+    @abstractmethod
+    async def retrieve(self, point_ids: List[str]) -> List[tuple]:
+        """Return (chunk_id, vector, payload) tuples for the given chunk IDs that exist"""
+    
+    @abstractmethod
+    async def document_ids(self) -> set:
+        """IDs of all documents with at least one stored vector"""
+    
+    async def store_chunks(self, chunks: List[DocumentChunk]):
+        """Store chunks in the vector index and the lexical index"""
+        try:
+            entries = []
+            lexical_entries = []
+            for chunk in chunks:
+                # Handle both DocumentChunk objects and dictionaries
+                if isinstance(chunk, dict):
+                    chunk_id = chunk.get('id')
+                    embedding = unpack_embedding(chunk.get('embedding'), chunk.get('embedding_dtype'))
+                    text = chunk.get('text')
+                    document_id = chunk.get('document_id')
+                    page_number = chunk.get('page_number')
+                    chunk_index = chunk.get('chunk_index')
+                    language = chunk.get('language')
+                else:
+                    chunk_id = chunk.id
+                    embedding = chunk.embedding
+                    text = chunk.text
+                    document_id = chunk.document_id
+                    page_number = chunk.page_number
+                    chunk_index = chunk.chunk_index
+                    language = chunk.language
+                
+                if embedding is not None and len(embedding):
+                    payload = {
+                        "text": text,
+                        "document_id": document_id,
+                        "page_number": page_number,
+                        "chunk_index": chunk_index,
+                        "language": language
+                    }
+                    entries.append((chunk_id, embedding, payload))
+                    lexical_entries.append((chunk_id, document_id, text, page_number, language))
+            
+            if entries:
+                logging.info(f"Storing {len(entries)} vectors in {type(self).__name__}")
+                await self.upsert(entries)
+                await run_in_executor(ingestion_executor, bm25_index.add, lexical_entries)
+                await invalidate_search_results()
+        
+        except Exception as e:
+            logging.error(f"Vector store error: {e}")
+            import traceback
+            logging.error(f"Traceback: {traceback.format_exc()}")
+            raise
+    
+    async def delete_points(self, point_ids: List[str]):
+        """Delete vectors by chunk ID"""
+        if not point_ids:
+            return
+        await self.delete(point_ids)
+        await run_in_executor(query_executor, bm25_index.remove, point_ids)
+        await invalidate_search_results()
+    
+    async def delete_document_points(self, document_id: str):
+        """Delete every vector belonging to a document"""
+        await self.delete_by_document(document_id)
+        await run_in_executor(query_executor, bm25_index.remove_document, document_id)
+        await invalidate_search_results()
+    
+    async def count_document_points(self, document_id: str) -> int:
+        """Count indexed vectors belonging to a document"""
+        return await self.count(document_id)
+    
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        similarity_threshold: float = 0.3,
+        retrieval_mode: str = "hybrid",
+        filters: Optional[SearchFilters] = None
+    ) -> List[Dict]:
+        """Search for relevant chunks: dense (thresholded), lexical (BM25) or both fused with RRF"""
+        try:
+            if filters is not None and filters.is_empty():
+                filters = None
+            normalized_query = normalize_text(query)
+            cache_key = (
+                normalized_query, limit, similarity_threshold, retrieval_mode,
+                filters.cache_key() if filters else None
+            )
+            cache_synced = await sync_search_results()
+            generation = search_result_cache.generation
+            cached_results = search_result_cache.get(cache_key) if cache_synced else None
+            if cached_results is not None:
+                return list(cached_results)
+            
+            # Create query embedding
+            query_embedding = query_embedding_cache.get(normalized_query)
+            if query_embedding is None:
+                query_embedding = await query_encoder.encode(query)
+                query_embedding_cache.set(normalized_query, query_embedding)
+            
+            dense_results = []
+            if retrieval_mode != "lexical":
+                # Documents being deleted stay invisible until their vectors are gone
+                results = await self.query(query_embedding, limit, filters, list(deleting_documents))
+                
+                # Filter results by similarity threshold
+                dense_results = [
+                    self._to_result(chunk_id, payload, score)
+                    for chunk_id, score, payload in results
+                    if score >= similarity_threshold
+                ]
+            
+            lexical_hits = []
+            if retrieval_mode != "dense":
+                # The index lock is shared with ingestion threads adding chunks; never wait on it in the loop
+                lexical_hits = await run_in_executor(query_executor, bm25_index.search, query, limit, filters)
+            if lexical_hits:
+                filtered_results = await self._fuse(dense_results, lexical_hits, query_embedding, limit)
+            else:
+                filtered_results = dense_results
+            
+            if cache_synced:
+                search_result_cache.set(cache_key, filtered_results, generation=generation)
+            return list(filtered_results)
+        
+        except Exception as e:
+            logging.error(f"Vector search error: {e}")
+            return []
+    
+    async def _fuse(
+        self,
+        dense_results: List[Dict],
+        lexical_hits: List[tuple],
+        query_embedding: List[float],
+        limit: int
+    ) -> List[Dict]:
+        """Reciprocal rank fusion of dense results and BM25 hits"""
+        results = {result["chunk_id"]: result for result in dense_results}
+        
+        # Lexical-only hits: load payloads and score them against the query, dropping
+        # those below the relevance floor (stopword-only matches of unrelated questions)
+        missing = [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in results]
+        if missing:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            query_vector /= np.linalg.norm(query_vector) or 1.0
+            for chunk_id, vector, payload in await self.retrieve(missing):
+                vector = np.asarray(vector, dtype=np.float32)
+                similarity = float(vector @ query_vector / (np.linalg.norm(vector) or 1.0))
+                if similarity >= LEXICAL_MIN_SIMILARITY:
+                    results[chunk_id] = self._to_result(chunk_id, payload, similarity)
+        
+        fused_scores: Dict[str, float] = {}
+        for rank, result in enumerate(dense_results, 1):
+            fused_scores[result["chunk_id"]] = 1.0 / (RRF_K + rank)
+        for rank, (chunk_id, _) in enumerate(lexical_hits, 1):
+            if chunk_id in results:
+                fused_scores[chunk_id] = fused_scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        
+        ranked = sorted(fused_scores, key=fused_scores.get, reverse=True)[:limit]
+        return [dict(results[chunk_id], fusion_score=fused_scores[chunk_id]) for chunk_id in ranked]
+    
+    @staticmethod
+    def _to_result(chunk_id: str, payload: Dict[str, Any], score: float) -> Dict:
+        return {
+            "chunk_id": chunk_id,
+            "text": payload["text"],
+            "document_id": payload["document_id"],
+            "page_number": payload["page_number"],
+            "similarity_score": score,
+            "language": payload["language"]
+        }
+
+class QdrantVectorStore(VectorStore):
+    """Qdrant vector database operations"""
+    
+    PAYLOAD_INDEXES = {
+        "document_id": PayloadSchemaType.KEYWORD,
+        "language": PayloadSchemaType.KEYWORD,
+        "page_number": PayloadSchemaType.INTEGER
+    }
+    
+    def __init__(self):
+        self.collection_name = "document_chunks"
+        self.search_params = self._search_params()
+        # Opened with the collection rather than at import: embedded storage loads every point
+        self.client = None
+        # Collection setup runs once per process; later calls only check this flag
+        self._collection_ready = False
+        self._collection_lock = asyncio.Lock()
+        # Embedded storage is not safe for concurrent writers
+        self._upsert_semaphore = asyncio.Semaphore(QDRANT_UPSERT_CONCURRENCY if QDRANT_URL else 1)
+    
+    async def initialize(self):
+        await self._ensure_collection()
+    
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+    
+    async def _ensure_collection(self):
+        """Create collection if it doesn't exist and apply the configured index settings"""
+        if self._collection_ready:
+            return
+        async with self._collection_lock:
+            if self._collection_ready:
+                return
+            try:
+                if self.client is None:
+                    self.client = await open_qdrant_client()
+                await self._setup_collection()
+                self._collection_ready = True
+            except Exception as e:
+                logging.error(f"Qdrant collection error: {e}")
+    
+    async def _setup_collection(self):
+        collections = (await self.client.get_collections()).collections
+        collection_names = [col.name for col in collections]
+        hnsw_config = HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT)
+        quantization_config = self._quantization_config()
+        
+        if self.collection_name not in collection_names:
+            await self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(
+                    size=EMBEDDING_DIMENSION,
+                    distance=Distance.COSINE,
+                    on_disk=VECTOR_ON_DISK
+                ),
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config
+            )
+        else:
+            await self._sync_index_config(hnsw_config, quantization_config)
+        
+        # Payload indexes let filtered searches skip non-matching points; creation is idempotent
+        for field_name, field_schema in self.PAYLOAD_INDEXES.items():
+            await self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+    
+    async def _sync_index_config(self, hnsw_config: HnswConfigDiff, quantization_config):
+        """Update HNSW and quantization settings of an existing collection when they changed"""
+        if not QDRANT_URL:
+            return  # local mode has no HNSW graph or quantized storage to update
+        config = (await self.client.get_collection(self.collection_name)).config
+        current_hnsw = config.hnsw_config
+        hnsw_changed = (current_hnsw.m, current_hnsw.ef_construct) != (hnsw_config.m, hnsw_config.ef_construct)
+        current_quantization = config.quantization_config
+        if quantization_config is None:
+            quantization_changed = current_quantization is not None
+        else:
+            quantization_changed = current_quantization != quantization_config
+        
+        if not (hnsw_changed or quantization_changed):
+            return
+        # The server rebuilds affected segments in the background
+        await self.client.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=hnsw_config if hnsw_changed else None,
+            quantization_config=(quantization_config or Disabled.DISABLED) if quantization_changed else None
+        )
+        logging.info(
+            f"Updated {self.collection_name} index config: m={HNSW_M}, "
+            f"ef_construct={HNSW_EF_CONSTRUCT}, quantization={VECTOR_QUANTIZATION}"
+        )
+    
+    @staticmethod
+    def _quantization_config():
+        if VECTOR_QUANTIZATION == 'scalar':
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if VECTOR_QUANTIZATION == 'binary':
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        if VECTOR_QUANTIZATION != 'none':
+            logging.error(f"Unknown VECTOR_QUANTIZATION '{VECTOR_QUANTIZATION}', using none")
+        return None
+    
+    @staticmethod
+    def _search_params() -> Optional[SearchParams]:
+        quantization = None
+        if VECTOR_QUANTIZATION in ('scalar', 'binary'):
+            quantization = QuantizationSearchParams(
+                rescore=QUANTIZATION_RESCORE,
+                oversampling=QUANTIZATION_OVERSAMPLING if QUANTIZATION_RESCORE else None
+            )
+        if quantization is None and not HNSW_EF:
+            return None
+        return SearchParams(hnsw_ef=HNSW_EF or None, quantization=quantization)
+    
+    async def upsert(self, entries: List[tuple]):
+        await self._ensure_collection()
+        points = await run_in_executor(ingestion_executor, self._build_points, entries)
+        await asyncio.gather(*(
+            self._upsert_batch(points[start:start + QDRANT_UPSERT_BATCH_SIZE])
+            for start in range(0, len(points), QDRANT_UPSERT_BATCH_SIZE)
+        ))
+    
+    @staticmethod
+    def _build_points(entries: List[tuple]) -> List[PointStruct]:
+        return [
+            PointStruct(id=chunk_id, vector=np.asarray(vector, dtype=np.float32).tolist(), payload=payload)
+            for chunk_id, vector, payload in entries
+        ]
+    
+    async def _upsert_batch(self, points: List[PointStruct]):
+        # The semaphore is shared by all callers, bounding in-flight upserts per process
+        async with self._upsert_semaphore:
+            await self.client.upsert(collection_name=self.collection_name, points=points)
+    
+    async def delete(self, point_ids: List[str]):
+        await self._ensure_collection()
+        await self.client.delete(collection_name=self.collection_name, points_selector=point_ids)
+    
+    async def delete_by_document(self, document_id: str):
+        await self._ensure_collection()
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))])
+            )
+        )
+    
+    async def count(self, document_id: Optional[str] = None) -> int:
+        await self._ensure_collection()
+        count_filter = None
+        if document_id is not None:
+            count_filter = Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))])
+        result = await self.client.count(
+            collection_name=self.collection_name,
+            count_filter=count_filter,
+            exact=True
+        )
+        return result.count
+    
+    async def query(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[SearchFilters] = None,
+        hidden_documents: Optional[List[str]] = None
+    ) -> List[tuple]:
+        await self._ensure_collection()
+        results = await self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector,
+            query_filter=self._build_filter(filters, hidden_documents),
+            search_params=self.search_params,
+            limit=limit
+        )
+        return [(str(result.id), result.score, result.payload) for result in results]
+    
+    async def retrieve(self, point_ids: List[str]) -> List[tuple]:
+        await self._ensure_collection()
+        points = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=point_ids,
+            with_payload=True,
+            with_vectors=True
+        )
+        return [(str(point.id), point.vector, point.payload) for point in points]
     
-    async def _process_chunks(self, document: Document):
-        """Process document into chunks and create embeddings"""
-        try:
-            # Create semantic chunks
-            chunker = SemanticChunker()
-            chunks = await chunker.create_chunks(document.content, document.id)
-            
-            # Create embeddings and store in Qdrant
-            vector_store = QdrantVectorStore()
-            await vector_store.store_chunks(chunks)
-            
-            # Update document status
-            await db.documents.update_one(
-                {"id": document.id},
-                {"$set": {"processing_status": "completed", "chunk_count": len(chunks)}}
-            )
-            
-        except Exception as e:
-            logging.error(f"Chunk processing error: {e}")
-            await db.documents.update_one(
-                {"id": document.id},
-                {"$set": {"processing_status": "failed"}}
+    async def document_ids(self) -> set:
+        await self._ensure_collection()
+        document_ids = set()
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                limit=VECTOR_RESTORE_BATCH_SIZE,
+                offset=offset,
+                with_payload=["document_id"],
+                with_vectors=False
             )
+            document_ids.update(point.payload["document_id"] for point in points)
+            if offset is None:
+                return document_ids
+    
+    @staticmethod
+    def _build_filter(filters: Optional[SearchFilters], hidden_documents: Optional[List[str]] = None) -> Optional[Filter]:
+        """Translate search filters into a Qdrant payload filter applied inside the vector search"""
+        excluded = []
+        if hidden_documents:
+            excluded.append(FieldCondition(key="document_id", match=MatchAny(any=hidden_documents)))
+        if filters is None:
+            return Filter(must_not=excluded) if excluded else None
+        conditions = []
+        if filters.document_ids:
+            conditions.append(FieldCondition(key="document_id", match=MatchAny(any=filters.document_ids)))
+        if filters.languages:
+            conditions.append(FieldCondition(key="language", match=MatchAny(any=filters.languages)))
+        if filters.page_from is not None or filters.page_to is not None:
+            conditions.append(FieldCondition(key="page_number", range=Range(gte=filters.page_from, lte=filters.page_to)))
+        if not (conditions or excluded):
+            return None
+        return Filter(must=conditions or None, must_not=excluded or None)
 
-class SemanticChunker:
-    """Advanced chunking with semantic awareness"""
+class NumpyVectorStore(VectorStore):
+    """Exact search over a memory-mapped float16 matrix; payloads live in a SQLite file next to it"""
     
-    async def create_chunks(self, text: str, document_id: str) -> List[DocumentChunk]:
-        """Create semantic chunks from document text"""
-        chunks = []
-        
-        # Split by pages first
-        pages = text.split('[Page ')
+    # Compact once this many rows are tombstoned and they outnumber live rows
+    COMPACT_MIN_DEAD = 10000
+    # Rows converted to float32 per step of a search scan
+    SCAN_BLOCK_ROWS = 16384
+    # Filters matching fewer than 1/N of the rows score only those rows instead of scanning all
+    SELECTIVE_SCAN_RATIO = 4
+    
+    def __init__(self, path: str = NUMPY_STORE_PATH, dimension: int = EMBEDDING_DIMENSION):
+        self.path = Path(path)
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        # Opened by initialize rather than at import: loading reads every SQLite row
+        self._db: Optional[sqlite3.Connection] = None
+    
+    async def initialize(self):
+        if self._db is None:
+            await run_in_executor(query_executor, self._open)
+    
+    def _open(self):
+        with self._lock:
+            if self._db is not None:
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path / "chunks.sqlite3"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS chunks (slot INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+                "document_id TEXT, page_number INTEGER, chunk_index INTEGER, language TEXT, text TEXT)"
+            )
+            # The generation names the vector file the slot numbers refer to (see _maybe_compact)
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._db.commit()
+            self._load()
+    
+    async def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._vectors.flush()
+                self._db.close()
+                self._db = None
+    
+    def _load(self):
+        """Open the vector file and rebuild the in-memory slot metadata from SQLite"""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        self._generation = row[0] if row else 0
+        # Files of other generations are left over from a compaction interrupted before or after its commit
+        for vector_file in self.path.glob("vectors*.f16*"):
+            if vector_file != self._vector_file(self._generation):
+                vector_file.unlink()
+        rows = self._db.execute("SELECT slot, id, document_id, page_number, language FROM chunks ORDER BY slot").fetchall()
+        self._size = rows[-1][0] + 1 if rows else 0
+        self._vectors = self._open_vectors(max(self._size, 1024))
+        self._ids: List[Optional[str]] = [None] * self._size
+        self._documents: List[Optional[str]] = [None] * self._size
+        self._slots: Dict[str, int] = {}
+        self._alive = np.zeros(len(self._vectors), dtype=np.bool_)
+        self._pages = np.zeros(len(self._vectors), dtype=np.int32)
+        self._language_codes = np.zeros(len(self._vectors), dtype=np.uint16)
+        self._languages: Dict[str, int] = {}
+        self._document_slots: Dict[str, set] = {}
+        for slot, chunk_id, document_id, page_number, language in rows:
+            self._set_slot(slot, chunk_id, document_id, page_number, language)
+        self._dead_count = self._size - len(rows)
+    
+    def _vector_file(self, generation: int) -> Path:
+        return self.path / ("vectors.f16" if generation == 0 else f"vectors.{generation}.f16")
+    
+    def _open_vectors(self, capacity: int) -> np.memmap:
+        """Map the vector file, growing it to hold at least `capacity` rows"""
+        vector_file = self._vector_file(self._generation)
+        row_bytes = self.dimension * 2
+        existing_rows = vector_file.stat().st_size // row_bytes if vector_file.exists() else 0
+        rows = max(existing_rows, capacity)
+        with open(vector_file, "ab") as handle:
+            handle.truncate(rows * row_bytes)
+        return np.memmap(vector_file, dtype=np.float16, mode="r+", shape=(rows, self.dimension))
+    
+    def _grow(self, required: int):
+        """Double the capacity until `required` rows fit (lock held)"""
+        capacity = len(self._vectors)
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        self._vectors.flush()
+        self._vectors = self._open_vectors(capacity)
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=np.bool_)])
+        self._pages = np.concatenate([self._pages, np.zeros(capacity - len(self._pages), dtype=np.int32)])
+        self._language_codes = np.concatenate(
+            [self._language_codes, np.zeros(capacity - len(self._language_codes), dtype=np.uint16)]
+        )
+    
+    def _set_slot(self, slot: int, chunk_id: str, document_id: str, page_number: Optional[int], language: Optional[str]):
+        self._ids[slot] = chunk_id
+        self._documents[slot] = document_id
+        self._slots[chunk_id] = slot
+        self._alive[slot] = True
+        self._pages[slot] = page_number or 0
+        self._language_codes[slot] = self._languages.setdefault(language or "", len(self._languages))
+        self._document_slots.setdefault(document_id, set()).add(slot)
+    
+    def _upsert_sync(self, entries: List[tuple]):
+        with self._lock:
+            new_count = sum(1 for chunk_id, _, _ in entries if chunk_id not in self._slots)
+            self._grow(self._size + new_count)
+            rows = []
+            for chunk_id, vector, payload in entries:
+                slot = self._slots.get(chunk_id)
+                if slot is None:
+                    slot = self._size
+                    self._size += 1
+                    self._ids.append(None)
+                    self._documents.append(None)
+                else:
+                    self._document_slots.get(self._documents[slot], set()).discard(slot)
+                # Stored normalized so a dot product is the cosine similarity
+                vector = np.asarray(vector, dtype=np.float32)
+                self._vectors[slot] = vector / (np.linalg.norm(vector) or 1.0)
+                self._set_slot(slot, chunk_id, payload["document_id"], payload["page_number"], payload["language"])
+                rows.append((
+                    slot, chunk_id, payload["document_id"], payload["page_number"],
+                    payload["chunk_index"], payload["language"], payload["text"]
+                ))
+            self._vectors.flush()
+            self._db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+    
+    def _delete_sync(self, point_ids: List[str]):
+        with self._lock:
+            slots = [self._slots.pop(chunk_id) for chunk_id in point_ids if chunk_id in self._slots]
+            self._tombstone(slots)
+    
+    def _delete_document_sync(self, document_id: str):
+        with self._lock:
+            slots = list(self._document_slots.get(document_id, ()))
+            for slot in slots:
+                self._slots.pop(self._ids[slot], None)
+            self._tombstone(slots)
+    
+    def _tombstone(self, slots: List[int]):
+        """Mark slots dead and drop their payloads (lock held)"""
+        if not slots:
+            return
+        for slot in slots:
+            self._alive[slot] = False
+            self._ids[slot] = None
+            document_slots = self._document_slots.get(self._documents[slot])
+            if document_slots is not None:
+                document_slots.discard(slot)
+                if not document_slots:
+                    del self._document_slots[self._documents[slot]]
+            self._documents[slot] = None
+        self._db.executemany("DELETE FROM chunks WHERE slot = ?", [(slot,) for slot in slots])
+        self._db.commit()
+        self._dead_count += len(slots)
+        self._maybe_compact()
+    
+    def _maybe_compact(self):
+        """Rewrite the matrix without tombstoned rows once they dominate it (lock held)"""
+        live_count = len(self._slots)
+        if self._dead_count < self.COMPACT_MIN_DEAD or self._dead_count < live_count:
+            return
+        started = time.perf_counter()
+        live_slots = np.flatnonzero(self._alive[:self._size])
+        # The compacted rows go to the next generation's file; the SQLite commit below switches
+        # slot numbers and generation together, so a crash leaves either the old or the new pair
+        compacted_file = self._vector_file(self._generation + 1)
+        capacity = max(live_count * 2, 1024)
+        compacted = np.memmap(compacted_file, dtype=np.float16, mode="w+", shape=(capacity, self.dimension))
+        for start in range(0, live_count, self.SCAN_BLOCK_ROWS):
+            block = live_slots[start:start + self.SCAN_BLOCK_ROWS]
+            compacted[start:start + len(block)] = self._vectors[block]
+        compacted.flush()
+        del compacted
         
-        for i, page_content in enumerate(pages[1:], 1):  # Skip first empty split
-            # Extract page number and content
-            if ']\n' in page_content:
-                page_num_str, content = page_content.split(']\n', 1)
-                page_number = int(page_num_str)
+        # Ascending order never moves a row onto a slot that is still occupied
+        self._db.executemany(
+            "UPDATE chunks SET slot = ? WHERE slot = ?",
+            [(new_slot, int(old_slot)) for new_slot, old_slot in enumerate(live_slots) if new_slot != old_slot]
+        )
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (self._generation + 1,))
+        self._db.commit()
+        del self._vectors
+        # Loading the new generation removes the old file
+        self._load()
+        logging.info(
+            f"Compacted vector store to {live_count} rows in {time.perf_counter() - started:.2f}s"
+        )
+    
+    def _count_sync(self, document_id: Optional[str] = None) -> int:
+        with self._lock:
+            if document_id is None:
+                return len(self._slots)
+            return len(self._document_slots.get(document_id, ()))
+    
+    def _filter_mask(self, filters: Optional[SearchFilters], hidden_documents: Optional[List[str]] = None) -> np.ndarray:
+        """Boolean mask over the first `_size` slots of live vectors matching `filters` (lock held)"""
+        mask = self._alive[:self._size].copy()
+        for document_id in hidden_documents or ():
+            mask[list(self._document_slots.get(document_id, ()))] = False
+        if filters is None:
+            return mask
+        if filters.document_ids:
+            document_mask = np.zeros_like(mask)
+            for document_id in filters.document_ids:
+                document_mask[list(self._document_slots.get(document_id, ()))] = True
+            mask &= document_mask
+        if filters.languages:
+            codes = [self._languages[language] for language in filters.languages if language in self._languages]
+            mask &= np.isin(self._language_codes[:self._size], codes)
+        if filters.page_from is not None:
+            mask &= self._pages[:self._size] >= filters.page_from
+        if filters.page_to is not None:
+            mask &= self._pages[:self._size] <= filters.page_to
+        return mask
+    
+    def _query_sync(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[SearchFilters] = None,
+        hidden_documents: Optional[List[str]] = None
+    ) -> List[tuple]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        with self._lock:
+            mask = self._filter_mask(filters, hidden_documents)
+            candidates = np.flatnonzero(mask)
+            if not len(candidates) or limit <= 0:
+                return []
+            if len(candidates) * self.SELECTIVE_SCAN_RATIO < self._size:
+                # Selective filter: gather and score only the matching rows
+                scores = np.empty(len(candidates), dtype=np.float32)
+                for start in range(0, len(candidates), self.SCAN_BLOCK_ROWS):
+                    block = candidates[start:start + self.SCAN_BLOCK_ROWS]
+                    scores[start:start + len(block)] = self._vectors[block].astype(np.float32) @ query
             else:
-                continue
+                # Contiguous blocks are cheaper to read than a gather of most rows
+                all_scores = np.empty(self._size, dtype=np.float32)
+                for start in range(0, self._size, self.SCAN_BLOCK_ROWS):
+                    stop = min(start + self.SCAN_BLOCK_ROWS, self._size)
+                    all_scores[start:stop] = self._vectors[start:stop].astype(np.float32) @ query
+                scores = all_scores[candidates]
             
-            # Split into semantic chunks (paragraphs)
-            paragraphs = [p.strip() for p in content.split('\n\n') if len(p.strip()) > 50]
-            
-            for chunk_idx, paragraph in enumerate(paragraphs):
-                # Detect language for this chunk
-                try:
-                    chunk_language = detect(paragraph)
-                except:
-                    chunk_language = 'en'
-                
-                # Create embedding
-                embedding = embedding_model.encode([paragraph])[0].tolist()
-                
-                chunk = DocumentChunk(
-                    document_id=document_id,
-                    text=paragraph,
-                    page_number=page_number,
-                    chunk_index=len(chunks),
-                    language=chunk_language,
-                    embedding=embedding
-                )
-                
-                chunks.append(chunk)
-                
-                # Store in MongoDB
-                await db.document_chunks.insert_one(chunk.model_dump())
-        
-        return chunks
-
-class QdrantVectorStore:
-    """Qdrant vector database operations"""
+            limit = min(limit, len(candidates))
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top])]
+            slots = [int(candidates[i]) for i in top]
+            top_scores = [float(scores[i]) for i in top]
+            chunk_ids = [self._ids[slot] for slot in slots]
+            payloads = self._payloads(slots)
+        return [
+            (chunk_id, score, payloads[slot]) for chunk_id, slot, score in zip(chunk_ids, slots, top_scores)
+        ]
     
-    def __init__(self):
-        self.collection_name = "document_chunks"
-        self._ensure_collection()
+    def _document_ids_sync(self) -> set:
+        with self._lock:
+            return set(self._document_slots)
     
-    def _ensure_collection(self):
-        """Create collection if it doesn't exist"""
-        try:
-            collections = qdrant_client.get_collections().collections
-            collection_names = [col.name for col in collections]
-            
-            if self.collection_name not in collection_names:
-                qdrant_client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=768,  # Multilingual model dimension
-                        distance=Distance.COSINE
-                    )
-                )
-        except Exception as e:
-            logging.error(f"Qdrant collection error: {e}")
+    def _retrieve_sync(self, point_ids: List[str]) -> List[tuple]:
+        with self._lock:
+            slots = [self._slots[chunk_id] for chunk_id in point_ids if chunk_id in self._slots]
+            payloads = self._payloads(slots)
+            return [(self._ids[slot], self._vectors[slot].astype(np.float32).tolist(), payloads[slot]) for slot in slots]
     
-    async def store_chunks(self, chunks: List[DocumentChunk]):
-        """Store chunks in Qdrant"""
-        try:
-            points = []
-            for chunk in chunks:
-                # Handle both DocumentChunk objects and dictionaries
-                if isinstance(chunk, dict):
-                    chunk_id = chunk.get('id')
-                    embedding = chunk.get('embedding')
-                    text = chunk.get('text')
-                    document_id = chunk.get('document_id')
-                    page_number = chunk.get('page_number')
-                    chunk_index = chunk.get('chunk_index')
-                    language = chunk.get('language')
-                else:
-                    chunk_id = chunk.id
-                    embedding = chunk.embedding
-                    text = chunk.text
-                    document_id = chunk.document_id
-                    page_number = chunk.page_number
-                    chunk_index = chunk.chunk_index
-                    language = chunk.language
-                
-                if embedding:
-                    # Create proper PointStruct for Qdrant
-                    point = PointStruct(
-                        id=chunk_id,
-                        vector=embedding,
-                        payload={
-                            "text": text,
-                            "document_id": document_id,
-                            "page_number": page_number,
-                            "chunk_index": chunk_index,
-                            "language": language
-                        }
-                    )
-                    points.append(point)
-            
-            if points:
-                logging.info(f"Storing {len(points)} points in Qdrant")
-                qdrant_client.upsert(
-                    collection_name=self.collection_name,
-                    points=points
-                )
-                logging.info("Successfully stored points in Qdrant")
-                
-        except Exception as e:
-            logging.error(f"Vector store error: {e}")
-            import traceback
-            logging.error(f"Traceback: {traceback.format_exc()}")
+    def _payloads(self, slots: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Load payloads of the given slots from SQLite (lock held)"""
+        if not slots:
+            return {}
+        rows = self._db.execute(
+            f"SELECT slot, document_id, page_number, chunk_index, language, text FROM chunks "
+            f"WHERE slot IN ({','.join('?' * len(slots))})",
+            slots
+        ).fetchall()
+        return {
+            slot: {
+                "text": text,
+                "document_id": document_id,
+                "page_number": page_number,
+                "chunk_index": chunk_index,
+                "language": language
+            }
+            for slot, document_id, page_number, chunk_index, language, text in rows
+        }
+    
+    async def upsert(self, entries: List[tuple]):
+        await self.initialize()
+        await run_in_executor(ingestion_executor, self._upsert_sync, entries)
+    
+    # Only upserts come from ingestion; deletes and counts serve requests and must not queue behind embedding batches
+    async def delete(self, point_ids: List[str]):
+        await self.initialize()
+        await run_in_executor(query_executor, self._delete_sync, point_ids)
+    
+    async def delete_by_document(self, document_id: str):
+        await self.initialize()
+        await run_in_executor(query_executor, self._delete_document_sync, document_id)
+    
+    async def count(self, document_id: Optional[str] = None) -> int:
+        await self.initialize()
+        return await run_in_executor(query_executor, self._count_sync, document_id)
     
-    async def search(self, query: str, limit: int = 10, similarity_threshold: float = 0.3) -> List[Dict]:
-        """Search for similar chunks with similarity threshold filtering"""
+    async def query(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[SearchFilters] = None,
+        hidden_documents: Optional[List[str]] = None
+    ) -> List[tuple]:
+        await self.initialize()
+        return await run_in_executor(query_executor, self._query_sync, query_vector, limit, filters, hidden_documents)
+    
+    async def retrieve(self, point_ids: List[str]) -> List[tuple]:
+        await self.initialize()
+        return await run_in_executor(query_executor, self._retrieve_sync, point_ids)
+    
+    async def document_ids(self) -> set:
+        await self.initialize()
+        return await run_in_executor(query_executor, self._document_ids_sync)
+
+def create_vector_store() -> VectorStore:
+    """Create the vector store selected by VECTOR_STORE_BACKEND"""
+    if VECTOR_STORE_BACKEND == 'numpy':
+        return NumpyVectorStore()
+    if VECTOR_STORE_BACKEND != 'qdrant':
+        logging.error(f"Unknown VECTOR_STORE_BACKEND '{VECTOR_STORE_BACKEND}', using qdrant")
+    return QdrantVectorStore()
+
+class CrossEncoderReranker:
+    """Batched cross-encoder reranking that stays within a latency budget"""
+    
+    # Re-measure after this many budget skips so a slow first estimate does not stick forever
+    _PROBE_AFTER_SKIPS = 20
+    
+    def __init__(
+        self,
+        model_name: str = RERANKER_MODEL_NAME,
+        candidates: int = RERANK_CANDIDATES,
+        max_latency_ms: float = RERANK_MAX_LATENCY_MS,
+        enabled: bool = RERANK_ENABLED
+    ):
+        self.model_name = model_name
+        self.candidates = candidates
+        self.max_latency_ms = max_latency_ms
+        self.enabled = enabled
+        self._model = None
+        self._model_lock = threading.Lock()
+        # Exponentially weighted scoring cost per (query, passage) pair
+        self._ms_per_pair: Optional[float] = None
+        self._skips_since_probe = 0
+    
+    async def rerank(self, query: str, candidates: List[Dict], top_n: int) -> tuple:
+        """Return the best `top_n` candidates and per-request reranking stats"""
+        stats = {"reranked": False, "candidates": len(candidates), "rerank_ms": 0.0}
+        if len(candidates) <= 1:
+            return candidates[:top_n], stats
+        # A cold load would blow the latency budget; until the startup load succeeds, keep retrieval order
+        if self._model is None:
+            stats["skipped"] = "model not loaded"
+            return candidates[:top_n], stats
+        
+        if self._ms_per_pair is not None:
+            estimate = self._ms_per_pair * len(candidates)
+            if estimate > self.max_latency_ms and self._skips_since_probe < self._PROBE_AFTER_SKIPS:
+                self._skips_since_probe += 1
+                stats["skipped"] = f"estimated {estimate:.0f}ms exceeds {self.max_latency_ms:.0f}ms budget"
+                return candidates[:top_n], stats
+        
         try:
-            # Create query embedding
-            query_embedding = embedding_model.encode([query])[0].tolist()
-            
-            # Search in Qdrant
-            results = qdrant_client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=limit
+            scores, elapsed_ms = await run_in_executor(
+                query_executor, self._score, query, [candidate["text"] for candidate in candidates]
             )
-            
-            # Filter results by similarity threshold
-            filtered_results = [
-                {
-                    "text": result.payload["text"],
-                    "document_id": result.payload["document_id"],
-                    "page_number": result.payload["page_number"],
-                    "similarity_score": result.score,
-                    "language": result.payload["language"]
-                }
-                for result in results
-                if result.score >= similarity_threshold
-            ]
-            
-            return filtered_results
-            
         except Exception as e:
-            logging.error(f"Vector search error: {e}")
-            return []
+            logging.error(f"Reranking failed, keeping retrieval order: {e}")
+            stats["skipped"] = f"scoring failed: {e}"
+            return candidates[:top_n], stats
+        per_pair = elapsed_ms / len(candidates)
+        self._ms_per_pair = per_pair if self._ms_per_pair is None else 0.8 * self._ms_per_pair + 0.2 * per_pair
+        self._skips_since_probe = 0
+        
+        ranked = sorted(zip(candidates, scores), key=lambda pair: pair[1], reverse=True)[:top_n]
+        stats.update(reranked=True, rerank_ms=round(elapsed_ms, 2))
+        return [dict(candidate, rerank_score=float(score)) for candidate, score in ranked], stats
+    
+    def _score(self, query: str, passages: List[str]) -> tuple:
+        """Score all pairs in one batched forward pass (blocking); returns (scores, elapsed ms)"""
+        model = self._get_model()
+        apply_intra_op_threads()
+        started = time.perf_counter()
+        scores = model.predict([(query, passage) for passage in passages], batch_size=len(passages))
+        return list(scores), (time.perf_counter() - started) * 1000
+    
+    def load(self):
+        """Load the model and run one pair through it (blocking); called at startup when enabled"""
+        model = self._get_model()
+        apply_intra_op_threads()
+        model.predict([("warm up", "warm up")])
+    
+    def _get_model(self):
+        # Loaded by the startup task only when reranking is enabled, so a disabled reranker costs nothing
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, device="cpu")
+            return self._model
 
 class StreamingRAGEngine:
     """RAG engine with streaming responses"""
     
-    def __init__(self):
-        self.vector_store = QdrantVectorStore()
+    def __init__(self, vector_store: VectorStore):
+        self.vector_store = vector_store
+        self.reranker = CrossEncoderReranker()
     
     async def stream_response(
         self, 
         query: str, 
-        session_id: str
+        session_id: str,
+        retrieval_mode: str = "hybrid",
+        filters: Optional[SearchFilters] = None
     ) -> AsyncGenerator[QueryResponse, None]:
         """Stream RAG response"""
         try:
-            # Search for relevant chunks
-            relevant_chunks = await self.vector_store.search(query, limit=5)
+            # Search for relevant chunks, over-fetching candidates when reranking
+            retrieval_stats = {}
+            if self.reranker.enabled:
+                candidates = await self.vector_store.search(
+                    query, limit=max(self.reranker.candidates, 5), retrieval_mode=retrieval_mode, filters=filters
+                )
+                relevant_chunks, retrieval_stats = await self.reranker.rerank(query, candidates, 5)
+                logging.info(f"Rerank stats: {retrieval_stats}")
+            else:
+                relevant_chunks = await self.vector_store.search(
+                    query, limit=5, retrieval_mode=retrieval_mode, filters=filters
+                )
             
             if not relevant_chunks:
                 yield QueryResponse(
                     content="I don't have enough information to answer that question based on the uploaded documents.",
                     sources=[],
                     confidence=0.1,
-                    is_complete=True
+                    is_complete=True,
+                    retrieval_stats=retrieval_stats
                 )
                 return
             
             # Build context
             context = self._build_context(relevant_chunks)
             
-            # Create Gemini chat
+            # Gemini credentials
             gemini_api_key = os.environ.get('GOOGLE_API_KEY')
             if not gemini_api_key:
                 raise HTTPException(status_code=500, detail="Google API key not configured")
             
-            chat = LlmChat(
-                api_key=gemini_api_key,
-                session_id=session_id,
-                system_message="""You are an expert document analyst. Answer questions based ONLY on the provided context from uploaded documents. 
-
-If the context doesn't contain enough information, clearly state what's missing.
-Always cite specific sources when making claims.
-For multilingual documents, maintain the language consistency of the user's question.
-Structure your response clearly with relevant details."""
-            ).with_model("gemini", "gemini-2.5-flash")
-            
             # Create prompt
             prompt = f"""Context from documents:
 {context}
@@ -384,11 +2437,6 @@ User Question: {query}
 
 Please provide a comprehensive answer based on the context above."""
             
-            user_message = UserMessage(text=prompt)
-            
-            # Get response (note: streaming not directly supported in current version)
-            response = await chat.send_message(user_message)
-            
             # Extract sources
             sources = [
                 {
@@ -400,11 +2448,31 @@ Please provide a comprehensive answer based on the context above."""
                 for chunk in relevant_chunks
             ]
             
+            if acompletion is None:
+                chat = LlmChat(
+                    api_key=gemini_api_key,
+                    session_id=session_id,
+                    system_message=RAG_SYSTEM_MESSAGE
+                ).with_model(LLM_PROVIDER, LLM_MODEL)
+                response = await chat.send_message(UserMessage(text=prompt))
+            else:
+                # Forward tokens as they arrive; sources go out with the first event
+                response = ""
+                async for delta in self._stream_tokens(gemini_api_key, prompt):
+                    yield QueryResponse(
+                        content=delta,
+                        sources=[] if response else sources,
+                        confidence=0.8,
+                        is_complete=False
+                    )
+                    response += delta
+            
             yield QueryResponse(
                 content=response,
                 sources=sources,
                 confidence=0.8,
-                is_complete=True
+                is_complete=True,
+                retrieval_stats=retrieval_stats
             )
             
         except Exception as e:
@@ -416,6 +2484,22 @@ Please provide a comprehensive answer based on the context above."""
                 is_complete=True
             )
     
+    async def _stream_tokens(self, api_key: str, prompt: str) -> AsyncGenerator[str, None]:
+        """Yield answer text deltas from the LLM as they are generated"""
+        stream = await acompletion(
+            model=f"{LLM_PROVIDER}/{LLM_MODEL}",
+            api_key=api_key,
+            messages=[
+                {"role": "system", "content": RAG_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    
     def _build_context(self, chunks: List[Dict]) -> str:
         """Build context from retrieved chunks"""
         context_parts = []
@@ -426,23 +2510,495 @@ Please provide a comprehensive answer based on the context above."""
         return "\n".join(context_parts)
 
 # Initialize processors
+embedding_model = EmbeddingModel(EMBEDDING_MODEL_NAME)
+bm25_index = BM25Index()
+language_identifier = create_language_identifier()
+embedding_cache = EmbeddingCache(embedding_model.cache_id)
+query_embedding_cache = TTLCache()
+query_encoder = QueryEncoderBatcher()
+# Documents hidden from search while their chunks and vectors are being removed
+deleting_documents: set = set()
+document_deletions: Dict[str, asyncio.Task] = {}
+search_result_cache = TTLCache()
+
+async def invalidate_search_results():
+    """Drop cached search results after an index change, in every worker sharing the index"""
+    search_result_cache.invalidate()
+    if SHARED_VECTOR_INDEX:
+        try:
+            await db.cache_generations.update_one(
+                {"_id": "search_results"}, {"$inc": {"generation": 1}}, upsert=True
+            )
+        except Exception as e:
+            logging.error(f"Publishing search cache invalidation failed: {e}")
+
+async def sync_search_results() -> bool:
+    """Catch up with index changes made by other workers; False if cached results cannot be trusted"""
+    if not SHARED_VECTOR_INDEX:
+        return True
+    try:
+        state = await db.cache_generations.find_one({"_id": "search_results"})
+    except Exception as e:
+        logging.error(f"Reading the search cache generation failed, bypassing the cache: {e}")
+        return False
+    search_result_cache.sync(state["generation"] if state else 0)
+    return True
+vector_store = create_vector_store()
 pdf_processor = AdvancedPDFProcessor()
-rag_engine = StreamingRAGEngine()
+rag_engine = StreamingRAGEngine(vector_store)
+ingestion_queue = IngestionQueue(pdf_processor)
+
+async def discard_document_data(document_ids: set):
+    """Delete the chunks and vectors of documents that must not be searchable"""
+    for document_id in document_ids:
+        await db.document_chunks.delete_many({"document_id": document_id})
+        await vector_store.delete_document_points(document_id)
+
+async def fail_interrupted_ingestions():
+    """Mark documents whose ingestion was cut off by a restart failed, dropping their partial chunks and vectors"""
+    interrupted = set()
+    async for document in db.documents.find(
+        {"processing_status": {"$in": ["pending", "processing"]}}, {"_id": 0, "id": 1}
+    ):
+        # Jobs queued by this process since startup are still running
+        if document["id"] not in ingestion_queue.jobs:
+            interrupted.add(document["id"])
+    if not interrupted:
+        return
+    await discard_document_data(interrupted)
+    await db.documents.update_many(
+        {"id": {"$in": list(interrupted)}, "processing_status": {"$in": ["pending", "processing"]}},
+        {"$set": {"processing_status": "failed"}}
+    )
+    logging.warning(f"Marked {len(interrupted)} documents interrupted by a restart as failed")
+
+async def restore_vector_index():
+    """Reconcile the vector index with MongoDB, re-upserting stored embeddings without re-encoding"""
+    started = time.perf_counter()
+    
+    # Only completed documents may be searchable; documents being deleted are left to their purge
+    await fail_interrupted_ingestions()
+    kept = set(await db.documents.distinct("id", {"processing_status": {"$in": ["completed", "deleting"]}}))
+    orphaned = set(await db.document_chunks.distinct("document_id")) - kept
+    
+    # Fast path: nothing to do when the index holds exactly the expected number of vectors
+    totals = await db.documents.aggregate([
+        {"$match": {"processing_status": "completed"}},
+        {"$group": {"_id": None, "chunks": {"$sum": "$chunk_count"}}}
+    ]).to_list(1)
+    expected = totals[0]["chunks"] if totals else 0
+    indexed = await vector_store.count()
+    if indexed != expected:
+        # Vectors of failed or vanished documents can only be found by scanning the index
+        orphaned |= await vector_store.document_ids() - kept
+    # Uploads accepted since startup are writing their chunks right now
+    orphaned -= set(ingestion_queue.jobs)
+    if orphaned:
+        await discard_document_data(orphaned)
+        logging.warning(f"Removed chunks and vectors of {len(orphaned)} documents that are not completed")
+        indexed = await vector_store.count()
+    if indexed == expected:
+        logging.info(f"Vector index up to date ({indexed} vectors)")
+        return
+    
+    restored_documents = 0
+    restored_points = 0
+    async for document in db.documents.find(
+        {"processing_status": "completed"}, {"_id": 0, "id": 1, "chunk_count": 1}
+    ):
+        if await vector_store.count_document_points(document["id"]) >= document.get("chunk_count", 0):
+            continue
+        
+        batch = []
+        async for chunk in db.document_chunks.find(
+            {"document_id": document["id"]},
+            {"_id": 0, "id": 1, "embedding": 1, "embedding_dtype": 1, "text": 1, "document_id": 1,
+             "page_number": 1, "chunk_index": 1, "language": 1}
+        ):
+            batch.append(chunk)
+            if len(batch) >= VECTOR_RESTORE_BATCH_SIZE:
+                await vector_store.store_chunks(batch)
+                restored_points += len(batch)
+                batch = []
+        if batch:
+            await vector_store.store_chunks(batch)
+            restored_points += len(batch)
+        restored_documents += 1
+    
+    logging.info(
+        f"Restored {restored_points} vectors for {restored_documents} documents "
+        f"in {time.perf_counter() - started:.2f}s (index had {indexed}, expected {expected})"
+    )
+
+# Indexes owned by this service; the rag_ prefix marks them for reconciliation
+MONGO_INDEXES = {
+    "documents": [
+        IndexModel([("file_hash", ASCENDING)], name="rag_file_hash", unique=True),
+        IndexModel([("id", ASCENDING)], name="rag_id", unique=True),
+        IndexModel([("uploaded_at", DESCENDING), ("id", DESCENDING)], name="rag_uploaded_at_id"),
+        IndexModel([("processing_status", ASCENDING)], name="rag_processing_status")
+    ],
+    "document_chunks": [
+        IndexModel([("id", ASCENDING)], name="rag_id", unique=True),
+        IndexModel([("document_id", ASCENDING), ("chunk_index", ASCENDING)], name="rag_document_id_chunk_index")
+    ],
+    "chat_sessions": [
+        IndexModel([("id", ASCENDING)], name="rag_id", unique=True),
+        IndexModel([("updated_at", DESCENDING), ("id", DESCENDING)], name="rag_updated_at_id")
+    ],
+    "chat_messages": [
+        IndexModel([("id", ASCENDING)], name="rag_id", unique=True),
+        IndexModel(
+            [("session_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)],
+            name="rag_session_id_timestamp_id"
+        )
+    ]
+}
+
+# Query shapes behind each endpoint, explained by the slow-query report: (source, collection, filter, sort)
+HOT_QUERIES = [
+    ("POST /upload-document", "documents", {"file_hash": ""}, None),
+    ("GET /documents", "documents", {}, [("uploaded_at", -1), ("id", -1)]),
+    ("GET /documents/{id}/progress", "documents", {"id": ""}, None),
+    ("DELETE /documents/{id}", "document_chunks", {"document_id": ""}, None),
+    ("GET /chat/sessions", "chat_sessions", {}, [("updated_at", -1), ("id", -1)]),
+    ("GET /chat/{id}/messages", "chat_messages", {"session_id": ""}, [("timestamp", 1), ("id", 1)]),
+    ("startup restore", "documents", {"processing_status": "completed"}, None),
+    ("startup restore", "document_chunks", {"document_id": ""}, None)
+]
+
+async def find_conflicting_index(collection, model: IndexModel) -> Optional[str]:
+    """Name of the existing index that blocks building model: same name, else same key"""
+    name = model.document["name"]
+    key = list(model.document["key"].items())
+    try:
+        existing = await collection.index_information()
+    except OperationFailure:
+        return None
+    if name in existing:
+        return name
+    for existing_name, info in existing.items():
+        if existing_name != "_id_" and list(info["key"]) == key:
+            return existing_name
+    return None
+
+async def ensure_indexes():
+    """Create declared indexes, rebuild ones whose definition changed and drop retired rag_ indexes"""
+    started = time.perf_counter()
+    for collection_name, models in MONGO_INDEXES.items():
+        collection = db[collection_name]
+        declared = {model.document["name"] for model in models}
+        try:
+            existing = await collection.index_information()
+        except OperationFailure:
+            existing = {}
+        for name in existing:
+            if name.startswith("rag_") and name not in declared:
+                try:
+                    await collection.drop_index(name)
+                    logging.info(f"Dropped retired index {collection_name}.{name}")
+                except OperationFailure as e:
+                    logging.error(f"Retired index {collection_name}.{name} could not be dropped: {e}")
+        
+        for model in models:
+            name = model.document["name"]
+            try:
+                await collection.create_indexes([model])
+            except OperationFailure as e:
+                # 85/86: an index with this name or key exists with other options
+                if e.code not in (85, 86):
+                    logging.error(f"Index {collection_name}.{name} could not be built: {e}")
+                    continue
+                conflicting = await find_conflicting_index(collection, model)
+                if conflicting is None:
+                    logging.error(f"Index {collection_name}.{name} conflicts with an index that was not found: {e}")
+                    continue
+                try:
+                    await collection.drop_index(conflicting)
+                except OperationFailure as drop_error:
+                    logging.error(f"Conflicting index {collection_name}.{conflicting} could not be dropped: {drop_error}")
+                    continue
+                try:
+                    await collection.create_indexes([model])
+                    logging.info(f"Rebuilt index {collection_name}.{name} with its new definition")
+                except OperationFailure as retry_error:
+                    logging.error(f"Index {collection_name}.{name} could not be rebuilt: {retry_error}")
+    logging.info(f"MongoDB indexes reconciled in {time.perf_counter() - started:.2f}s")
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Stages and indexes used by a winning query plan"""
+    stages = []
+    indexes = []
+    pending = [plan]
+    while pending:
+        stage = pending.pop()
+        stages.append(stage.get("stage"))
+        if stage.get("indexName"):
+            indexes.append(stage["indexName"])
+        pending.extend(stage.get("inputStages", []))
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+    return {"stages": stages, "indexes": indexes}
+
+async def query_coverage_report() -> List[Dict[str, Any]]:
+    """Explain every hot query; collection scans and in-memory sorts are reported as not covered"""
+    report = []
+    for source, collection_name, query_filter, sort in HOT_QUERIES:
+        command = {"find": collection_name, "filter": query_filter, "limit": 1}
+        if sort:
+            command["sort"] = dict(sort)
+        entry = {"source": source, "collection": collection_name, "filter": list(query_filter), "sort": sort}
+        try:
+            explained = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            plan = summarize_plan(explained["queryPlanner"]["winningPlan"])
+            entry.update(plan, covered="COLLSCAN" not in plan["stages"] and "SORT" not in plan["stages"])
+        except Exception as e:
+            entry.update(covered=None, error=str(e))
+        report.append(entry)
+    return report
+
+async def bootstrap_mongo_indexes():
+    """Reconcile indexes, then warn about hot queries that still scan or sort in memory"""
+    try:
+        await ensure_indexes()
+        if MONGO_PROFILE_SLOW_MS:
+            await db.command({"profile": 1, "slowms": MONGO_PROFILE_SLOW_MS})
+        for entry in await query_coverage_report():
+            if entry["covered"] is False:
+                logging.warning(
+                    f"Query from {entry['source']} on {entry['collection']} is not index-covered: {entry['stages']}"
+                )
+    except Exception as e:
+        logging.error(f"MongoDB index bootstrap failed: {e}")
+
+async def build_lexical_index():
+    """Load chunk text from MongoDB into the in-memory BM25 index"""
+    started = time.perf_counter()
+    try:
+        batch = []
+        projection = {"_id": 0, "id": 1, "document_id": 1, "text": 1, "page_number": 1, "language": 1}
+        async for chunk in db.document_chunks.find({}, projection):
+            if chunk["document_id"] in deleting_documents:
+                continue
+            batch.append((chunk["id"], chunk["document_id"], chunk["text"], chunk.get("page_number"), chunk.get("language")))
+            if len(batch) >= VECTOR_RESTORE_BATCH_SIZE:
+                await run_in_executor(ingestion_executor, bm25_index.add, batch)
+                batch = []
+        if batch:
+            await run_in_executor(ingestion_executor, bm25_index.add, batch)
+        search_result_cache.invalidate()
+        logging.info(f"Lexical index built with {len(bm25_index)} chunks in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logging.error(f"Lexical index build failed: {e}")
 
 # API Routes
 @api_router.get("/")
 async def root():
     return {"message": "Advanced RAG System API"}
 
-@api_router.post("/upload-document")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process PDF document"""
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def health_ready():
+    """Readiness probe: model loaded and warm, vector index restored, database reachable"""
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=2)
+        database = {"state": "ready"}
+    except Exception as e:
+        database = {"state": "unreachable", "error": str(e) or type(e).__name__}
+    
+    index_task = getattr(app.state, "index_task", None)
+    components = {
+        "model": embedding_model.stats(),
+        "vector_index": {"state": getattr(app.state, "vector_index_state", "starting")},
+        "lexical_index": {
+            "state": "ready" if index_task is not None and index_task.done() else "building",
+            "chunks": len(bm25_index)
+        },
+        "database": database
+    }
+    # Lexical search degrades gracefully while its index builds, so it does not gate readiness
+    ready = (
+        embedding_model.ready
+        and components["vector_index"]["state"] == "ready"
+        and database["state"] == "ready"
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "components": components}
+    )
+
+@api_router.get("/diagnostics/slow-queries")
+async def get_slow_queries(limit: int = Query(50, ge=1, le=500)):
+    """Index coverage of every endpoint query, plus recent slow operations from the MongoDB profiler"""
+    slow_operations = []
+    if MONGO_PROFILE_SLOW_MS:
+        try:
+            async for operation in db["system.profile"].find(
+                {"millis": {"$gte": MONGO_PROFILE_SLOW_MS}},
+                {"_id": 0, "ns": 1, "op": 1, "millis": 1, "planSummary": 1, "docsExamined": 1, "nreturned": 1, "ts": 1}
+            ).sort("ts", -1).limit(limit):
+                slow_operations.append(operation)
+        except Exception as e:
+            logging.error(f"Reading the MongoDB profiler failed: {e}")
+    
+    coverage = await query_coverage_report()
+    return {
+        "uncovered": [entry for entry in coverage if entry["covered"] is False],
+        "queries": coverage,
+        "slow_operations": slow_operations
+    }
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Get embedding, query embedding and search result cache counters and query batching stats"""
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "search_result_cache": search_result_cache.stats(),
+        "query_encoder": query_encoder.stats()
+    }
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {MAX_UPLOAD_BYTES} bytes")
+
+class UploadSpool:
+    """Writes the `file` part of a streamed multipart body to a temp file, hashing it on the way"""
+    
+    def __init__(self, boundary: bytes):
+        self.filename: Optional[str] = None
+        self.size = 0
+        self._digest = hashlib.md5()
+        self._spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", dir=UPLOAD_TMP_DIR, delete=False)
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        # File bytes parsed but not yet written; flushed in UPLOAD_CHUNK_SIZE writes
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+    
+    @property
+    def path(self) -> str:
+        return self._spool.name
+    
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+    
+    async def feed(self, data: bytes):
+        """Parse a chunk of the request body"""
+        self._parser.write(data)
+        if self._pending_bytes >= UPLOAD_CHUNK_SIZE:
+            await self._flush()
+    
+    async def finish(self):
+        """Write the remaining file bytes and close the spool"""
+        self._parser.finalize()
+        if self.filename is None:
+            raise HTTPException(status_code=422, detail="Missing file field")
+        await self._flush()
+        self._spool.close()
+    
+    def discard(self):
+        self._spool.close()
+        os.unlink(self._spool.name)
+    
+    async def _flush(self):
+        if not self._pending:
+            return
+        data = b"".join(self._pending)
+        self._pending, self._pending_bytes = [], 0
+        await run_in_executor(ingestion_executor, self._write, data)
+    
+    def _write(self, data: bytes):
+        self._digest.update(data)
+        self._spool.write(data)
+    
+    def _on_part_begin(self):
+        self._headers = {}
+    
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
     
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+    
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != b"file" or self.filename is not None:
+            return
+        filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        if not filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+        self.filename = filename
+        self._in_file = True
+    
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_file:
+            return
+        self.size += end - start
+        if self.size > MAX_UPLOAD_BYTES:
+            raise upload_too_large()
+        self._pending.append(data[start:end])
+        self._pending_bytes += end - start
+    
+    def _on_part_end(self):
+        self._in_file = False
+
+async def spool_upload(request: Request) -> tuple:
+    """Stream an upload's PDF to a temp file as the body arrives; returns (filename, path, md5, size)"""
+    _, options = parse_options_header(request.headers.get("content-type", ""))
+    if b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+    
+    spool = UploadSpool(options[b"boundary"])
+    try:
+        async for data in request.stream():
+            await spool.feed(data)
+        await spool.finish()
+    except BaseException:
+        spool.discard()
+        raise
+    return spool.filename, spool.path, spool.hexdigest(), spool.size
+
+# The body is parsed by spool_upload, so the form is only declared for the API docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+@api_router.post("/upload-document", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_document(request: Request):
+    """Upload and process PDF document"""
     try:
-        content = await file.read()
-        document = await pdf_processor.process_pdf(content, file.filename)
+        filename, file_path, file_hash, _ = await spool_upload(request)
+        document = await pdf_processor.process_pdf(file_path, file_hash, filename)
         
         return {
             "document_id": document.id,
@@ -452,13 +3008,100 @@ async def upload_document(file: UploadFile = File(...)):
             "status": document.processing_status
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/documents/{document_id}/progress")
+async def get_document_progress(document_id: str):
+    """Get ingestion progress (pages and chunks done) for a document"""
+    progress = ingestion_queue.jobs.get(document_id)
+    if progress is not None:
+        return progress
+    
+    # Jobs from earlier runs or pruned from history: derive from the stored record
+    document = await db.documents.find_one(
+        {"id": document_id},
+        {"_id": 0, "processing_status": 1, "page_count": 1, "chunk_count": 1, "uploaded_at": 1}
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    completed = document["processing_status"] == "completed"
+    return IngestionProgress(
+        document_id=document_id,
+        status=document["processing_status"],
+        pages_total=document["page_count"],
+        pages_done=document["page_count"] if completed else 0,
+        chunks_done=document.get("chunk_count", 0),
+        queued_at=document["uploaded_at"]
+    )
+
+def encode_cursor(value: Any, item_id: str) -> str:
+    """Opaque keyset cursor for the last item of a page"""
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    return base64.urlsafe_b64encode(json.dumps([value, item_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+        return value, item_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    projection: Dict[str, int],
+    sort_field: str,
+    descending: bool,
+    limit: int,
+    after: Optional[str],
+    response: Response
+) -> List[Dict[str, Any]]:
+    """One keyset page ordered by (sort_field, id); sets X-Next-Cursor when more items follow"""
+    if after:
+        value, item_id = decode_cursor(after)
+        operator = "$lt" if descending else "$gt"
+        # Seek past the cursor instead of skipping, so every page costs the same
+        query = {
+            **query,
+            "$or": [
+                {sort_field: {operator: value}},
+                {sort_field: value, "id": {operator: item_id}}
+            ]
+        }
+    direction = -1 if descending else 1
+    items = await collection.find(query, {**projection, "_id": 0, "id": 1, sort_field: 1}).sort(
+        [(sort_field, direction), ("id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1][sort_field], items[-1]["id"])
+    return items
+
 @api_router.get("/documents")
-async def get_documents():
-    """Get all uploaded documents"""
-    documents = await db.documents.find().sort("uploaded_at", -1).to_list(100)
+async def get_documents(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None
+):
+    """Get uploaded documents, newest first; pass the X-Next-Cursor header as `after` for the next page"""
+    documents = await fetch_page(
+        db.documents,
+        {},
+        {"filename": 1, "page_count": 1, "language": 1, "processing_status": 1, "chunk_count": 1},
+        "uploaded_at",
+        True,
+        limit,
+        after,
+        response
+    )
     return [
         {
             "id": doc["id"],
@@ -480,16 +3123,42 @@ async def create_chat_session(session_name: str = "New Chat"):
     return session
 
 @api_router.get("/chat/sessions")
-async def get_chat_sessions():
-    """Get all chat sessions"""
-    sessions = await db.chat_sessions.find().sort("updated_at", -1).to_list(100)
-    return [ChatSession(**session) for session in sessions]
+async def get_chat_sessions(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None
+):
+    """Get chat sessions, most recently updated first; paginated like /documents"""
+    # Stored rows already match ChatSession, so they are returned without re-validation
+    return await fetch_page(
+        db.chat_sessions,
+        {},
+        {"session_name": 1, "created_at": 1},
+        "updated_at",
+        True,
+        limit,
+        after,
+        response
+    )
 
 @api_router.get("/chat/{session_id}/messages")
-async def get_chat_messages(session_id: str):
-    """Get messages for a chat session"""
-    messages = await db.chat_messages.find({"session_id": session_id}).sort("timestamp", 1).to_list(1000)
-    return [ChatMessage(**message) for message in messages]
+async def get_chat_messages(
+    session_id: str,
+    response: Response,
+    limit: int = Query(1000, ge=1, le=1000),
+    after: Optional[str] = None
+):
+    """Get messages for a chat session in chronological order; paginated like /documents"""
+    return await fetch_page(
+        db.chat_messages,
+        {"session_id": session_id},
+        {"session_id": 1, "role": 1, "content": 1, "sources": 1, "confidence": 1},
+        "timestamp",
+        False,
+        limit,
+        after,
+        response
+    )
 
 @api_router.post("/chat/query")
 async def query_documents(request: QueryRequest):
@@ -508,9 +3177,13 @@ async def query_documents(request: QueryRequest):
             response_content = ""
             sources = []
             
-            async for partial_response in rag_engine.stream_response(request.query, request.session_id):
-                response_content = partial_response.content
-                sources = partial_response.sources
+            async for partial_response in rag_engine.stream_response(
+                request.query, request.session_id, request.retrieval_mode, request.filters
+            ):
+                # Partial events carry token deltas; the final event has the full answer
+                if partial_response.is_complete:
+                    response_content = partial_response.content
+                    sources = partial_response.sources
                 
                 # Stream response
                 yield f"data: {json.dumps(partial_response.model_dump())}\n\n"
@@ -527,44 +3200,89 @@ async def query_documents(request: QueryRequest):
         
         return StreamingResponse(
             generate_response(),
-            media_type="text/plain",
-            headers={"Cache-Control": "no-cache"}
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.delete("/documents/{document_id}")
-async def delete_document(document_id: str):
-    """Delete a document and its chunks"""
+async def hide_document(document_id: str):
+    """Tombstone a document: mark it deleting and remove it from search results immediately"""
+    deleting_documents.add(document_id)
+    await db.documents.update_one({"id": document_id}, {"$set": {"processing_status": "deleting"}})
+    await run_in_executor(query_executor, bm25_index.remove_document, document_id)
+    await invalidate_search_results()
+
+async def purge_document(document_id: str) -> Dict[str, Any]:
+    """Remove a tombstoned document's vectors, chunks and record without loading its chunks"""
+    started = time.perf_counter()
     try:
-        # First, get all chunk IDs for this document from MongoDB
-        chunk_docs = await db.document_chunks.find({"document_id": document_id}).to_list(length=None)
-        chunk_ids = [doc["id"] for doc in chunk_docs]
-        
-        # Delete from MongoDB
-        delete_result = await db.documents.delete_one({"id": document_id})
+        # The document stays tombstoned until an ingestion job writing it has stopped
+        ingestion_queue.cancel(document_id)
+        await ingestion_queue.wait_stopped(document_id)
+        deleted_vectors = await vector_store.count_document_points(document_id)
+        # Vectors first: a restart resumes from the document record, which is removed last
+        await vector_store.delete_document_points(document_id)
         chunks_result = await db.document_chunks.delete_many({"document_id": document_id})
+        delete_result = await db.documents.delete_one({"id": document_id})
+        deleting_documents.discard(document_id)
+    finally:
+        document_deletions.pop(document_id, None)
+    
+    logging.info(
+        f"Document deletion completed: document_id={document_id}, mongodb_docs={delete_result.deleted_count}, "
+        f"mongodb_chunks={chunks_result.deleted_count}, vectors={deleted_vectors} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return {
+        "deleted_document": delete_result.deleted_count > 0,
+        "deleted_chunks": chunks_result.deleted_count,
+        "deleted_vectors": deleted_vectors
+    }
+
+def schedule_document_purge(document_id: str):
+    """Purge a tombstoned document in the background"""
+    async def run():
+        try:
+            await purge_document(document_id)
+        except Exception as e:
+            # The document stays hidden with its deleting status and is retried on the next startup
+            logging.error(f"Background deletion of document {document_id} failed: {e}")
+    
+    if document_id not in document_deletions:
+        document_deletions[document_id] = asyncio.create_task(run())
+
+async def resume_document_deletions():
+    """Hide and purge documents whose deletion was interrupted by a restart"""
+    async for document in db.documents.find({"processing_status": "deleting"}, {"_id": 0, "id": 1}):
+        deleting_documents.add(document["id"])
+        schedule_document_purge(document["id"])
+
+@api_router.delete("/documents/{document_id}")
+async def delete_document(document_id: str, background: Optional[bool] = None):
+    """Delete a document and its chunks; large documents (or background=true) are removed asynchronously"""
+    try:
+        if document_id in document_deletions:
+            return JSONResponse(
+                status_code=202,
+                content={"message": "Document deletion in progress", "document_id": document_id, "status": "deleting"}
+            )
         
-        # Delete from Qdrant using the chunk IDs
-        if chunk_ids:
-            try:
-                qdrant_client.delete(
-                    collection_name="document_chunks",
-                    points_selector=chunk_ids
-                )
-                logging.info(f"Successfully deleted {len(chunk_ids)} vector embeddings from Qdrant for document {document_id}")
-            except Exception as e:
-                logging.error(f"Failed to delete from Qdrant: {e}")
+        document = await db.documents.find_one({"id": document_id}, {"_id": 0, "chunk_count": 1})
+        if background is None:
+            background = (document or {}).get("chunk_count", 0) > DOCUMENT_DELETE_ASYNC_THRESHOLD
         
-        logging.info(f"Document deletion completed: document_id={document_id}, mongodb_docs={delete_result.deleted_count}, mongodb_chunks={chunks_result.deleted_count}, qdrant_vectors={len(chunk_ids)}")
+        await hide_document(document_id)
+        if background:
+            schedule_document_purge(document_id)
+            return JSONResponse(
+                status_code=202,
+                content={"message": "Document deletion started", "document_id": document_id, "status": "deleting"}
+            )
         
-        return {
-            "message": "Document and all associated data deleted successfully",
-            "deleted_document": delete_result.deleted_count > 0,
-            "deleted_chunks": chunks_result.deleted_count,
-            "deleted_vectors": len(chunk_ids)
-        }
+        result = await purge_document(document_id)
+        return {"message": "Document and all associated data deleted successfully", **result}
         
     except Exception as e:
         logging.error(f"Error deleting document {document_id}: {e}")
@@ -573,6 +3291,42 @@ async def delete_document(document_id: str):
 # Include the router
 app.include_router(api_router)
 
+class UploadSizeLimitMiddleware:
+    """Reject oversized uploads from Content-Length before reading the body, and stop reading
+    bodies (chunked or with a false Content-Length) once they pass the limit"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != "/api/upload-document":
+            await self.app(scope, receive, send)
+            return
+        
+        # Allow some headroom for multipart boundaries and headers
+        limit = MAX_UPLOAD_BYTES + 64 * 1024
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            error = upload_too_large()
+            await JSONResponse(status_code=error.status_code, content={"detail": error.detail})(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > limit:
+                # Raised inside the route's body read, so it becomes an ordinary 413 response
+                raise upload_too_large()
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# Registered before CORS so the CORS middleware wraps it and the 413 carries CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -580,11 +3334,69 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+@app.on_event("startup")
+async def startup_ingestion_queue():
+    ingestion_queue.start()
+    if PDF_EXTRACTION_MODE == "parallel" and PDF_EXTRACTION_PROCESSES > 1:
+        # Start extraction workers in the background so the first upload does not pay for it
+        executor = get_extraction_executor()
+        for _ in range(PDF_EXTRACTION_PROCESSES):
+            executor.submit(warm_up)
+
+async def load_embedding_model():
+    """Load and warm up the embedding model off the event loop"""
+    try:
+        await run_in_executor(query_executor, embedding_model.load)
+    except Exception as e:
+        logging.error(f"Embedding model load failed: {e}")
+
+async def load_reranker_model():
+    """Load and warm up the cross-encoder off the event loop; reranking is skipped until it is ready"""
+    try:
+        await run_in_executor(query_executor, rag_engine.reranker.load)
+    except Exception as e:
+        logging.error(f"Reranker model load failed, answers will use retrieval order: {e}")
+
+async def prepare_indexes():
+    """Resume interrupted deletions, restore the vector index, then rebuild the in-memory lexical index"""
+    app.state.vector_index_state = "restoring"
+    # Tombstones go in first so the restored indexes hide documents still being purged
+    try:
+        await resume_document_deletions()
+    except Exception as e:
+        logging.error(f"Resuming document deletions failed: {e}")
+    try:
+        await vector_store.initialize()
+        await restore_vector_index()
+        app.state.vector_index_state = "ready"
+    except Exception as e:
+        app.state.vector_index_state = "failed"
+        logging.error(f"Vector index restore failed: {e}")
+    await build_lexical_index()
+
+@app.on_event("startup")
+async def startup_background_tasks():
+    # Model loading and index restore run in the background so the worker answers
+    # liveness probes immediately; /api/health/ready reports when it can take traffic
+    app.state.model_load_task = asyncio.create_task(load_embedding_model())
+    if rag_engine.reranker.enabled:
+        app.state.reranker_load_task = asyncio.create_task(load_reranker_model())
+    app.state.mongo_index_task = asyncio.create_task(bootstrap_mongo_indexes())
+    app.state.index_task = asyncio.create_task(prepare_indexes())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await ingestion_queue.stop()
+    await query_encoder.stop()
+    client.close()
+    await vector_store.close()
+    ingestion_executor.shutdown(wait=False, cancel_futures=True)
+    if _extraction_executor is not None:
+        _extraction_executor.shutdown(wait=False, cancel_futures=True)
+    query_executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
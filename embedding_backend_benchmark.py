@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark embedding backends against the fp32 PyTorch model
+Reports batch throughput and single-query latency per backend, plus an equivalence check:
+per-text cosine agreement with fp32 vectors and recall@k of the backend's query vectors
+searched against an fp32-encoded corpus (the mixed case after switching backends)
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import server  # noqa: E402
+
+BACKENDS = os.environ.get("BENCH_BACKENDS", "onnx,onnx-int8").split(",")
+CORPUS_SIZE = int(os.environ.get("BENCH_CORPUS", "2000"))
+QUERY_COUNT = int(os.environ.get("BENCH_QUERIES", "100"))
+TOP_K = 10
+MIN_COSINE = 0.98
+MIN_RECALL = 0.90
+
+SUBJECTS = {
+    "en": ["the hydraulic pump", "the brake caliper", "error code E-{n}", "the cooling fan", "part PN-{n}"],
+    "de": ["die Hydraulikpumpe", "der Bremssattel", "Fehlercode E-{n}", "der Lüfter", "Teil PN-{n}"],
+    "fr": ["la pompe hydraulique", "l'étrier de frein", "le code d'erreur E-{n}", "le ventilateur", "la pièce PN-{n}"],
+}
+ACTIONS = {
+    "en": ["must be calibrated after {n} hours", "is replaced when pressure drops below {n} bar", "requires torque of {n} Nm"],
+    "de": ["muss nach {n} Stunden kalibriert werden", "wird unter {n} bar ersetzt", "erfordert ein Drehmoment von {n} Nm"],
+    "fr": ["doit être étalonné après {n} heures", "est remplacé sous {n} bar", "nécessite un couple de {n} Nm"],
+}
+
+def build_texts(count, seed):
+    """Manual-like multilingual sentences"""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        language = rng.choice(list(SUBJECTS))
+        subject = rng.choice(SUBJECTS[language]).format(n=rng.integers(100, 9999))
+        action = rng.choice(ACTIONS[language]).format(n=rng.integers(1, 500))
+        texts.append(f"{subject[0].upper()}{subject[1:]} {action}.")
+    return texts
+
+def encode(model, texts):
+    vectors = np.asarray(model.encode(texts, batch_size=32), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def measure(model, corpus, queries):
+    started = time.perf_counter()
+    corpus_vectors = encode(model, corpus)
+    throughput = len(corpus) / (time.perf_counter() - started)
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        started = time.perf_counter()
+        query_vectors.append(encode(model, [query])[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return corpus_vectors, np.array(query_vectors), throughput, np.percentile(latencies, 50)
+
+def top_k(query_vectors, corpus_vectors):
+    scores = query_vectors @ corpus_vectors.T
+    return [set(np.argpartition(-row, TOP_K)[:TOP_K].tolist()) for row in scores]
+
+def run_benchmark():
+    corpus = build_texts(CORPUS_SIZE, seed=1)
+    queries = build_texts(QUERY_COUNT, seed=2)
+    print(f"{len(corpus)} corpus texts, {len(queries)} queries, recall@{TOP_K} against fp32\n")
+
+    reference = server.EmbeddingModel(server.EMBEDDING_MODEL_NAME, backend="torch")
+    reference.load()
+    reference_corpus, reference_queries, throughput, latency = measure(reference, corpus, queries)
+    expected = top_k(reference_queries, reference_corpus)
+    print(f"{'backend':<12} {'texts/s':>9} {'p50 ms':>8} {'cosine':>8} {'min cos':>8} {'recall':>8}")
+    print(f"{'torch':<12} {throughput:>9.0f} {latency:>8.2f} {1.0:>8.4f} {1.0:>8.4f} {1.0:>8.3f}")
+
+    passed = True
+    for backend in BACKENDS:
+        model = server.EmbeddingModel(server.EMBEDDING_MODEL_NAME, backend=backend)
+        try:
+            model.load()
+        except Exception as e:
+            print(f"⚠️  {backend} skipped: {e}")
+            continue
+        corpus_vectors, query_vectors, throughput, latency = measure(model, corpus, queries)
+        cosines = np.sum(corpus_vectors * reference_corpus, axis=1)
+        found = top_k(query_vectors, reference_corpus)
+        recall = sum(len(a & b) for a, b in zip(found, expected)) / (len(queries) * TOP_K)
+        print(
+            f"{backend:<12} {throughput:>9.0f} {latency:>8.2f} {cosines.mean():>8.4f} "
+            f"{cosines.min():>8.4f} {recall:>8.3f}"
+        )
+        passed &= cosines.mean() >= MIN_COSINE and recall >= MIN_RECALL
+
+    print()
+    print("✅ Backends agree with fp32 vectors" if passed else
+          f"❌ A backend fell below cosine {MIN_COSINE} or recall {MIN_RECALL}")
+    return passed
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmark() else 1)
@@ -163,21 +163,27 @@ function App() {
 
       setMessages(prev => [...prev, assistantMessage]);
 
+      const decoder = new TextDecoder();
+      let buffer = '';
+
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
 
-        const chunk = new TextDecoder().decode(value);
-        const lines = chunk.split('\n');
+        // Keep any partial line until the rest of it arrives
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
 
         for (const line of lines) {
           if (line.startsWith('data: ')) {
             try {
               const data = JSON.parse(line.slice(6));
+              // Partial events carry token deltas, the final event the full answer
               assistantMessage = {
                 ...assistantMessage,
-                content: data.content,
-                sources: data.sources,
+                content: data.is_complete ? data.content : assistantMessage.content + data.content,
+                sources: data.sources.length > 0 ? data.sources : assistantMessage.sources,
                 confidence: data.confidence
               };
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-chunk language identification cost
+Compares the old per-paragraph langdetect.detect call with the batched stage
+(inherit-document-language policy, langdetect and fastText backends)
+"""
+
+import os
+import sys
+import time
+
+from langdetect import detect
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import server  # noqa: E402
+
+SAMPLES = {
+    "en": "The maintenance manual describes the calibration procedure for the hydraulic pump in detail.",
+    "de": "Das Wartungshandbuch beschreibt das Kalibrierungsverfahren für die Hydraulikpumpe im Detail.",
+    "fr": "Le manuel d'entretien décrit en détail la procédure d'étalonnage de la pompe hydraulique.",
+    "az": "Texniki xidmət kitabçası hidravlik nasosun kalibrləmə qaydasını ətraflı təsvir edir.",
+}
+CHUNK_COUNT = int(os.environ.get("BENCH_CHUNKS", "2000"))
+
+def build_chunks():
+    """Mostly English chunks of mixed length with some foreign-language paragraphs"""
+    chunks = []
+    languages = list(SAMPLES)
+    for i in range(CHUNK_COUNT):
+        language = "en" if i % 5 else languages[(i // 5) % len(languages)]
+        repeats = 1 + i % 4  # 90 to 360 characters
+        chunks.append((language, " ".join([SAMPLES[language]] * repeats)))
+    return chunks
+
+def baseline(texts):
+    results = []
+    for text in texts:
+        try:
+            results.append(detect(text))
+        except Exception:
+            results.append("en")
+    return results
+
+def report(name, expected, predicted, elapsed):
+    accuracy = sum(e == p for e, p in zip(expected, predicted)) / len(expected)
+    print(f"{name:<32} {elapsed * 1e6 / len(expected):8.1f} µs/chunk   accuracy {accuracy:.1%}")
+
+def run_benchmark():
+    chunks = build_chunks()
+    expected = [language for language, _ in chunks]
+    texts = [text for _, text in chunks]
+    print(f"{len(texts)} chunks, inherit below {server.LANGUAGE_INHERIT_MIN_CHARS} chars\n")
+    
+    started = time.perf_counter()
+    predicted = baseline(texts)
+    report("langdetect.detect per chunk", expected, predicted, time.perf_counter() - started)
+    
+    backends = [server.LangdetectIdentifier()]
+    try:
+        backends.append(server.FastTextIdentifier())
+    except (ImportError, ValueError, OSError) as e:
+        print(f"⚠️  fastText backend skipped: {e}")
+    
+    for identifier in backends:
+        started = time.perf_counter()
+        predicted = identifier.detect_chunks(texts, "en")
+        report(f"{identifier.name} + inherit policy", expected, predicted, time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        predicted = [language or "en" for language, _ in identifier.predict_batch(texts)]
+        report(f"{identifier.name} every chunk", expected, predicted, time.perf_counter() - started)
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark BM25 lexical search latency and exactness
+Builds a synthetic manual-like corpus (Zipf-distributed vocabulary plus part numbers and error
+codes) in the in-memory BM25 index, then reports query latency for natural-language and
+exact-identifier queries and checks every pruned top-k against exhaustive scoring.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import server  # noqa: E402
+
+CHUNK_COUNT = int(os.environ.get("BENCH_CHUNKS", "1000000"))
+QUERY_COUNT = int(os.environ.get("BENCH_QUERIES", "500"))
+VOCABULARY_SIZE = 50000
+# Paragraph lengths vary like real chunks, so scores do not tie
+MIN_WORDS, MAX_WORDS = 20, 120
+TOP_K = 10
+TARGET_P95_MS = float(os.environ.get("BENCH_TARGET_MS", "10"))
+
+def build_corpus(rng):
+    """Chunks of Zipf-distributed words, some carrying a part number or error code"""
+    vocabulary = np.array([f"w{i}" for i in range(VOCABULARY_SIZE)])
+    for i in range(CHUNK_COUNT):
+        ranks = (rng.zipf(1.1, size=rng.integers(MIN_WORDS, MAX_WORDS + 1)) - 1) % VOCABULARY_SIZE
+        text = " ".join(vocabulary[ranks])
+        if i % 5 == 0:
+            text += f" part PN-{i % 40000:05d} error E-{i % 9000:04d}"
+        yield (f"chunk-{i}", f"document-{i // 500}", text, i % 300 + 1, "en")
+
+def build_queries(rng):
+    """(kind, query) pairs: exact identifiers, and questions mixing stopword-like and content words"""
+    queries = []
+    for i in range(QUERY_COUNT):
+        if i % 4 == 0:
+            queries.append(("identifier", f"PN-{rng.integers(0, 40000):05d}"))
+        elif i % 4 == 1:
+            queries.append(("identifier", f"error E-{rng.integers(0, 9000):04d} w0 w1"))
+        else:
+            common = rng.integers(0, 20, size=rng.integers(1, 4))
+            content = rng.integers(100, 20000, size=rng.integers(1, 4))
+            queries.append(("natural", " ".join(f"w{word}" for word in np.concatenate([common, content]))))
+    return queries
+
+def run_benchmark():
+    rng = np.random.default_rng(7)
+    index = server.BM25Index()
+    started = time.perf_counter()
+    batch = []
+    for chunk in build_corpus(rng):
+        batch.append(chunk)
+        if len(batch) >= 10000:
+            index.add(batch)
+            batch = []
+    index.add(batch)
+    print(f"Indexed {len(index)} chunks in {time.perf_counter() - started:.1f}s {index.stats()}")
+
+    queries = build_queries(rng)
+    latencies = {"identifier": [], "natural": []}
+    mismatches = 0
+    for kind, query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, TOP_K)
+        latencies[kind].append((time.perf_counter() - started) * 1000)
+        # A limit beyond the corpus size disables pruning: the exhaustive reference
+        expected = index.search(query, CHUNK_COUNT)[:TOP_K]
+        scores, expected_scores = [score for _, score in hits], [score for _, score in expected]
+        if len(scores) != len(expected_scores) or not np.allclose(scores, expected_scores, rtol=1e-5):
+            mismatches += 1
+
+    print(f"{len(queries)} queries, top-{TOP_K}")
+    for kind, values in latencies.items():
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"  {kind:<11} p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
+    p95 = np.percentile(latencies["identifier"] + latencies["natural"], 95)
+    print(f"Top-k mismatches against exhaustive scoring: {mismatches}")
+
+    passed = mismatches == 0 and p95 <= TARGET_P95_MS
+    print("✅ Lexical search is exact and within the latency target" if passed else
+          f"❌ Mismatched results or p95 above {TARGET_P95_MS} ms")
+    return passed
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmark() else 1)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Convert chunk embeddings in MongoDB to packed binary
+Rewrites document_chunks rows whose embedding is a float array (or packed with another dtype)
+as little-endian binary of the target dtype plus an embedding_dtype field. Safe to stop and
+re-run: only rows not yet in the target dtype are touched, and the server reads both layouts.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from bson import Binary
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+load_dotenv(Path(__file__).parent / "backend" / ".env")
+
+DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+def pending_filter(dtype):
+    """Rows with an embedding that is not yet packed as dtype"""
+    return {"embedding": {"$ne": None}, "embedding_dtype": {"$ne": dtype}}
+
+def convert(chunk, dtype):
+    """Packed binary of a stored embedding in either layout"""
+    if "embedding_dtype" in chunk:
+        vector = np.frombuffer(chunk["embedding"], dtype=DTYPES[chunk["embedding_dtype"]])
+    else:
+        vector = chunk["embedding"]
+    return Binary(np.asarray(vector, dtype=DTYPES[dtype]).tobytes())
+
+def migrate(collection, dtype, batch_size, dry_run):
+    """Rewrite pending rows in batches of bulk updates, returning the number converted"""
+    pending = collection.count_documents(pending_filter(dtype))
+    print(f"{pending} chunks to convert to {dtype}")
+    if dry_run or not pending:
+        return 0
+
+    started = time.perf_counter()
+    converted = 0
+    operations = []
+    cursor = collection.find(
+        pending_filter(dtype), {"_id": 1, "embedding": 1, "embedding_dtype": 1}, batch_size=batch_size
+    )
+    for chunk in cursor:
+        operations.append(UpdateOne(
+            {"_id": chunk["_id"]},
+            {"$set": {"embedding": convert(chunk, dtype), "embedding_dtype": dtype}}
+        ))
+        if len(operations) >= batch_size:
+            converted += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+            print(f"  {converted}/{pending} ({converted / (time.perf_counter() - started):.0f} chunks/s)")
+    if operations:
+        converted += collection.bulk_write(operations, ordered=False).modified_count
+
+    print(f"Converted {converted} chunks in {time.perf_counter() - started:.1f}s")
+    return converted
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default=os.environ.get("EMBEDDING_STORAGE_DTYPE", "float32"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="only count the rows that would be converted")
+    args = parser.parse_args()
+
+    collection = MongoClient(os.environ["MONGO_URL"])[os.environ["DB_NAME"]].document_chunks
+    migrate(collection, args.dtype, args.batch_size, args.dry_run)
+    remaining = collection.count_documents(pending_filter(args.dtype))
+    print("✅ All embeddings are packed" if not remaining else f"❌ {remaining} chunks still pending")
+    return remaining == 0 or args.dry_run
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs page-parallel PDF text extraction
+Builds a synthetic text-heavy PDF and checks both modes return identical pages
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from pdf_extraction import extract_page_range, split_page_range  # noqa: E402
+
+PAGE_COUNT = int(os.environ.get("BENCH_PAGES", "400"))
+PROCESSES = int(os.environ.get("BENCH_PROCESSES", str(os.cpu_count() or 1)))
+LINES_PER_PAGE = 60
+
+def create_benchmark_pdf(path, page_count):
+    """Create a PDF with dense text on every page"""
+    pdf_doc = fitz.open()
+    for page_num in range(page_count):
+        page = pdf_doc.new_page()
+        text = "\n".join(
+            f"Page {page_num + 1} line {line}: error code E-{page_num:04d}{line:02d} in part PN-{line * 37:05d} "
+            f"requires torque calibration before reassembly."
+            for line in range(LINES_PER_PAGE)
+        )
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=6)
+    pdf_doc.save(path)
+    pdf_doc.close()
+
+def run_serial(path, page_count):
+    return extract_page_range(path, 0, page_count)
+
+def run_parallel(executor, path, page_count, processes):
+    ranges = split_page_range(page_count, processes * 4, 8)
+    futures = [executor.submit(extract_page_range, path, start, stop) for start, stop in ranges]
+    return [text for future in futures for text in future.result()]
+
+def run_benchmark():
+    """Compare pages/second of both extraction modes"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "benchmark.pdf")
+        create_benchmark_pdf(path, PAGE_COUNT)
+        print(f"Benchmark PDF: {PAGE_COUNT} pages, {os.path.getsize(path) / 1024:.0f} KiB, {PROCESSES} processes")
+        
+        started = time.perf_counter()
+        serial_pages = run_serial(path, PAGE_COUNT)
+        serial_elapsed = time.perf_counter() - started
+        print(f"Serial:   {serial_elapsed:.2f}s ({PAGE_COUNT / serial_elapsed:.0f} pages/s)")
+        
+        with ProcessPoolExecutor(max_workers=PROCESSES, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # Warm the pool so process start-up is not counted
+            list(executor.map(abs, range(PROCESSES)))
+            started = time.perf_counter()
+            parallel_pages = run_parallel(executor, path, PAGE_COUNT, PROCESSES)
+            parallel_elapsed = time.perf_counter() - started
+        print(f"Parallel: {parallel_elapsed:.2f}s ({PAGE_COUNT / parallel_elapsed:.0f} pages/s)")
+        
+        identical = parallel_pages == serial_pages
+        speedup = serial_elapsed / parallel_elapsed
+        print(f"Speedup: {speedup:.1f}x")
+        print("✅ Page order and text identical" if identical else "❌ Parallel output differs from serial output")
+        return identical
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmark() else 1)
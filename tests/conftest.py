@@ -0,0 +1,83 @@
+"""
+Shared fixtures: the backend module runs against mongomock, a temporary NumPy vector store,
+a fresh BM25 index and a deterministic fake encoder, all on one event loop per session
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# Read by the server module at import: keep any Qdrant client in memory and never use real settings
+os.environ["QDRANT_PATH"] = ":memory:"
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "rag_test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+def fake_vector(text: str) -> np.ndarray:
+    """Unit vector seeded by the text, so equal texts embed identically"""
+    seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+    vector = np.random.default_rng(seed).standard_normal(server.EMBEDDING_DIMENSION).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture
+def run(loop):
+    """Run a coroutine to completion on the session event loop"""
+    return loop.run_until_complete
+
+@pytest.fixture
+def db(monkeypatch):
+    database = AsyncMongoMockClient()["rag_test"]
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    """Replace the sentence-transformer with fake_vector"""
+    def encode(texts, **kwargs):
+        return np.stack([fake_vector(text) for text in texts])
+    monkeypatch.setattr(server.embedding_model, "encode", encode)
+    return encode
+
+@pytest.fixture
+def lexical_index(monkeypatch):
+    index = server.BM25Index()
+    monkeypatch.setattr(server, "bm25_index", index)
+    return index
+
+@pytest.fixture
+def vector_store(monkeypatch, tmp_path, run, lexical_index):
+    store = server.NumpyVectorStore(path=str(tmp_path / "vector_store"))
+    monkeypatch.setattr(server, "vector_store", store)
+    monkeypatch.setattr(server.rag_engine, "vector_store", store)
+    monkeypatch.setattr(server, "search_result_cache", server.TTLCache())
+    yield store
+    run(store.close())
+
+@pytest.fixture
+def ingestion_queue(monkeypatch, run, db, vector_store, fake_encoder):
+    """A started single-worker queue wired into the module, with fresh deletion state"""
+    queue = server.IngestionQueue(server.pdf_processor, worker_count=1)
+    monkeypatch.setattr(server, "ingestion_queue", queue)
+    monkeypatch.setattr(server, "deleting_documents", set())
+    monkeypatch.setattr(server, "document_deletions", {})
+    
+    async def start():
+        queue.start()
+    
+    run(start())
+    yield queue
+    run(queue.stop())
@@ -0,0 +1,142 @@
+"""BM25 lexical index: exact MaxScore top-k, tombstones, filters and compaction"""
+
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import server
+from server import BM25Index, SearchFilters
+
+def build_corpus(chunk_count, seed=3):
+    """(chunk_id, document_id, text, page_number, language) tuples over a Zipf vocabulary"""
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for i in range(chunk_count):
+        words = (rng.zipf(1.3, size=rng.integers(5, 40)) - 1) % 2000
+        text = " ".join(f"w{word}" for word in words)
+        if i % 7 == 0:
+            text += f" error E-{i % 50:04d}"
+        chunks.append((f"c{i}", f"d{i // 25}", text, i % 30 + 1, "de" if i % 3 == 0 else "en"))
+    return chunks
+
+def build_queries(count, seed=4):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in range(count):
+        if i % 5 == 0:
+            queries.append(f"error E-{rng.integers(0, 50):04d}")
+        else:
+            common = rng.integers(0, 10, size=rng.integers(1, 3))
+            content = rng.integers(10, 600, size=rng.integers(1, 4))
+            words = np.concatenate([common, content])
+            queries.append(" ".join(f"w{word}" for word in words))
+    return queries
+
+def matches(chunk, filters):
+    _, document_id, _, page_number, language = chunk
+    return (
+        (not filters.document_ids or document_id in filters.document_ids)
+        and (not filters.languages or language in filters.languages)
+        and (filters.page_from is None or page_number >= filters.page_from)
+        and (filters.page_to is None or page_number <= filters.page_to)
+    )
+
+def reference_scores(chunks, query, filters=None, k1=server.BM25_K1, b=server.BM25_B):
+    """BM25 straight from its definition, over every chunk; statistics ignore filters like the index"""
+    term_counts = {chunk[0]: Counter(BM25Index.tokenize(chunk[2])) for chunk in chunks}
+    average_length = sum(sum(counts.values()) for counts in term_counts.values()) / len(chunks)
+    scores = {}
+    for term in set(BM25Index.tokenize(query)):
+        df = sum(1 for counts in term_counts.values() if term in counts)
+        if not df:
+            continue
+        idf = math.log(1 + (len(chunks) - df + 0.5) / (df + 0.5))
+        for chunk in chunks:
+            tf = term_counts[chunk[0]].get(term)
+            if tf and (filters is None or matches(chunk, filters)):
+                length = sum(term_counts[chunk[0]].values())
+                scores[chunk[0]] = scores.get(chunk[0], 0.0) + idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+    return scores
+
+def assert_same_top_k(hits, expected_scores, limit):
+    """Hits are a valid top-k: the best `limit` scores, each attached to a chunk that has that score"""
+    expected = sorted(expected_scores.values(), reverse=True)[:limit]
+    assert len(hits) == len(expected)
+    assert np.allclose([score for _, score in hits], expected, rtol=1e-4)
+    for chunk_id, score in hits:
+        assert expected_scores[chunk_id] == pytest.approx(score, rel=1e-4)
+
+def exhaustive(index, query, filters=None):
+    """Scores of every matching chunk: a limit beyond the index size leaves nothing to prune"""
+    return dict(index.search(query, len(index) + 1, filters))
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    tokens = BM25Index.tokenize("Error E-1234 on part PN-00042.")
+    assert {"error", "e-1234", "1234", "pn-00042", "pn", "00042", "on", "part"} <= set(tokens)
+    assert "e" not in tokens
+
+def test_scores_follow_bm25_definition():
+    chunks = build_corpus(400)
+    index = BM25Index()
+    index.add(chunks)
+    for query in build_queries(30):
+        assert_same_top_k(index.search(query, 10), reference_scores(chunks, query), 10)
+
+@pytest.mark.parametrize("limit", [1, 5, 10, 50])
+def test_pruned_top_k_matches_exhaustive_scoring_with_tombstones(limit):
+    chunks = build_corpus(3000)
+    index = BM25Index()
+    index.add(chunks)
+    for document_number in range(0, 120, 9):
+        index.remove_document(f"d{document_number}")
+    index.remove([f"c{i}" for i in range(1, 3000, 13)])
+    assert index.stats()["tombstoned"] > 0
+    
+    for query in build_queries(60):
+        assert_same_top_k(index.search(query, limit), exhaustive(index, query), limit)
+
+@pytest.mark.parametrize("filters", [
+    SearchFilters(document_ids=["d3", "d40", "d77"]),
+    SearchFilters(languages=["de"]),
+    SearchFilters(page_from=5, page_to=9),
+    SearchFilters(document_ids=["d10", "d11"], languages=["en"], page_from=20)
+])
+def test_filtered_search_matches_definition(filters):
+    chunks = build_corpus(2000)
+    index = BM25Index()
+    index.add(chunks)
+    by_id = {chunk[0]: chunk for chunk in chunks}
+    for query in build_queries(20):
+        hits = index.search(query, 10, filters)
+        assert all(matches(by_id[chunk_id], filters) for chunk_id, _ in hits)
+        assert_same_top_k(hits, reference_scores(chunks, query, filters), 10)
+
+def test_removed_chunks_are_never_returned():
+    chunks = build_corpus(500)
+    index = BM25Index()
+    index.add(chunks)
+    index.remove_document("d2")
+    index.remove(["c0", "c7"])
+    removed = {chunk[0] for chunk in chunks if chunk[1] == "d2"} | {"c0", "c7"}
+    for query in build_queries(30):
+        assert not removed & {chunk_id for chunk_id, _ in index.search(query, 50)}
+    assert len(index) == 500 - len(removed)
+
+def test_compaction_leaves_the_same_results_as_a_fresh_index():
+    chunks = build_corpus(10500)
+    index = BM25Index()
+    index.add(chunks)
+    survivors = chunks[::35]
+    surviving_ids = {chunk[0] for chunk in survivors}
+    index.remove([chunk[0] for chunk in chunks if chunk[0] not in surviving_ids])
+    assert index.stats()["tombstoned"] == 0
+    assert len(index) == len(survivors)
+    
+    fresh = BM25Index()
+    fresh.add(survivors)
+    for query in build_queries(30):
+        assert_same_top_k(index.search(query, 10), reference_scores(survivors, query), 10)
+        compacted_scores = [score for _, score in index.search(query, 10)]
+        assert np.allclose(compacted_scores, [score for _, score in fresh.search(query, 10)], rtol=1e-5)
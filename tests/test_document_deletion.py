@@ -0,0 +1,107 @@
+"""Deleting a document while its ingestion job is running or still queued"""
+
+import asyncio
+import threading
+import uuid
+
+import fitz
+import pytest
+
+import server
+
+def make_pdf(path, pages: int, tag: str) -> str:
+    """A PDF with one chunk-sized paragraph per page; the tag keeps its texts out of the embedding cache"""
+    document = fitz.open()
+    for page in range(pages):
+        document.new_page().insert_text((72, 72), f"Calibration of the {tag} sensor is described on page {page}.")
+    path.write_bytes(document.tobytes())
+    return str(path)
+
+@pytest.fixture
+def gated_encoder(monkeypatch, fake_encoder):
+    """Encode the first batch at once and block every later batch until the gate opens"""
+    gate = threading.Event()
+    calls = []
+    
+    def encode(texts, **kwargs):
+        calls.append(len(texts))
+        if len(calls) > 1:
+            gate.wait(timeout=10)
+        return fake_encoder(texts, **kwargs)
+    
+    monkeypatch.setattr(server.embedding_model, "encode", encode)
+    # Sequential extraction keeps the test free of worker processes
+    monkeypatch.setattr(server, "PDF_EXTRACTION_MODE", "sequential")
+    yield gate
+    gate.set()
+
+async def wait_until(condition, timeout: float = 10.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+async def remaining_data(document_id: str, tag: str) -> dict:
+    return {
+        "documents": await server.db.documents.count_documents({"id": document_id}),
+        "chunks": await server.db.document_chunks.count_documents({"document_id": document_id}),
+        "vectors": await server.vector_store.count_document_points(document_id),
+        "lexical_hits": len(server.bm25_index.search(tag, 10))
+    }
+
+def test_delete_during_ingestion_removes_every_written_batch(run, tmp_path, ingestion_queue, gated_encoder):
+    tag = f"zeta{uuid.uuid4().hex[:8]}"
+    
+    async def scenario():
+        file_path = make_pdf(tmp_path / "manual.pdf", 40, tag)
+        document = await server.pdf_processor.process_pdf(file_path, uuid.uuid4().hex, "manual.pdf")
+        progress = ingestion_queue.jobs[document.id]
+        # The first batch is searchable while the second waits at the encoder
+        await wait_until(lambda: progress.chunks_done >= server.EMBEDDING_BATCH_SIZE)
+        assert (await remaining_data(document.id, tag))["lexical_hits"] > 0
+        
+        await server.hide_document(document.id)
+        assert server.bm25_index.search(tag, 10) == []
+        purge = asyncio.create_task(server.purge_document(document.id))
+        await asyncio.sleep(0.05)
+        # Purging waits for the running job to stop
+        assert not purge.done()
+        gated_encoder.set()
+        result = await purge
+        return document, progress, result, await remaining_data(document.id, tag)
+    
+    document, progress, result, remaining = run(scenario())
+    assert progress.status == "cancelled"
+    assert result["deleted_document"]
+    assert remaining == {"documents": 0, "chunks": 0, "vectors": 0, "lexical_hits": 0}
+    assert server.deleting_documents == set()
+    assert server.document_deletions == {}
+    assert not (tmp_path / "manual.pdf").exists()
+
+def test_delete_of_queued_document_skips_its_job(run, tmp_path, ingestion_queue, gated_encoder):
+    tag = f"omega{uuid.uuid4().hex[:8]}"
+    
+    async def scenario():
+        running = await server.pdf_processor.process_pdf(
+            make_pdf(tmp_path / "running.pdf", 40, f"{tag}a"), uuid.uuid4().hex, "running.pdf"
+        )
+        queued = await server.pdf_processor.process_pdf(
+            make_pdf(tmp_path / "queued.pdf", 5, f"{tag}b"), uuid.uuid4().hex, "queued.pdf"
+        )
+        assert ingestion_queue.jobs[queued.id].status == "queued"
+        
+        result = await server.delete_document(queued.id, background=False)
+        gated_encoder.set()
+        await wait_until(lambda: ingestion_queue.jobs[queued.id].status == "cancelled")
+        await wait_until(lambda: ingestion_queue.jobs[running.id].status == "completed")
+        running_chunks = await server.db.document_chunks.count_documents({"document_id": running.id})
+        return running, queued, result, running_chunks, await remaining_data(queued.id, f"{tag}b")
+    
+    running, queued, result, running_chunks, remaining = run(scenario())
+    assert result["deleted_document"]
+    assert remaining == {"documents": 0, "chunks": 0, "vectors": 0, "lexical_hits": 0}
+    assert ingestion_queue.jobs[queued.id].attempts == 0
+    assert ingestion_queue.jobs[running.id].chunks_done == running_chunks == 40
+    assert server.deleting_documents == set()
+    assert not (tmp_path / "queued.pdf").exists()
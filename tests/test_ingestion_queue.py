@@ -0,0 +1,180 @@
+"""Ingestion queue: retries with backoff, failure after the last retry, cancellation and back-pressure"""
+
+import asyncio
+
+import pytest
+
+import server
+from server import Document, IngestionQueue, IngestionQueueFull
+
+real_sleep = asyncio.sleep
+
+class FakeProcessor:
+    """Stands in for AdvancedPDFProcessor: fails a given number of attempts, optionally blocks until released"""
+    
+    def __init__(self, failures: int = 0, blocked: bool = False):
+        self.failures = failures
+        self.calls = []
+        self.discarded = []
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+    
+    async def _process_chunks(self, document, file_path, progress):
+        self.calls.append(document.id)
+        await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("encoder crashed")
+        return 7
+    
+    async def _discard_chunks(self, document_id):
+        self.discarded.append(document_id)
+
+def make_document(name: str) -> Document:
+    return Document(
+        id=name, filename=f"{name}.pdf", page_count=3, language="en", file_hash=name, processing_status="processing"
+    )
+
+def spooled_file(tmp_path, name: str) -> str:
+    path = tmp_path / f"{name}.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    return str(path)
+
+async def wait_finished(progress, timeout: float = 5.0):
+    """Poll until the job reaches a terminal status"""
+    for _ in range(int(timeout / 0.01)):
+        if progress.status in ("completed", "failed", "cancelled"):
+            return
+        await real_sleep(0.01)
+    raise AssertionError(f"job {progress.document_id} still {progress.status}")
+
+@pytest.fixture
+def backoff(monkeypatch):
+    """Record retry delays instead of sleeping through them"""
+    delays = []
+    
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+    
+    monkeypatch.setattr(server.asyncio, "sleep", sleep)
+    return delays
+
+@pytest.fixture
+def queue_state(monkeypatch, db):
+    monkeypatch.setattr(server, "deleting_documents", set())
+    return db
+
+def test_failed_attempt_is_retried_after_backoff(run, tmp_path, queue_state, backoff):
+    async def scenario():
+        processor = FakeProcessor(failures=1)
+        queue = IngestionQueue(processor, worker_count=1, max_retries=2)
+        queue.start()
+        try:
+            file_path = spooled_file(tmp_path, "a")
+            progress = queue.submit(make_document("a"), file_path)
+            await wait_finished(progress)
+        finally:
+            await queue.stop()
+        return processor, progress, file_path
+    
+    processor, progress, file_path = run(scenario())
+    assert progress.status == "completed"
+    assert progress.attempts == 2
+    assert progress.chunks_done == 7
+    assert processor.calls == ["a", "a"]
+    # Partial writes of the failed attempt are discarded before the retry
+    assert processor.discarded == ["a"]
+    assert backoff == [2]
+    assert not (tmp_path / "a.pdf").exists()
+
+def test_document_fails_after_last_retry(run, tmp_path, queue_state, backoff):
+    async def scenario():
+        await queue_state.documents.insert_one(make_document("a").model_dump())
+        processor = FakeProcessor(failures=10)
+        queue = IngestionQueue(processor, worker_count=1, max_retries=2)
+        queue.start()
+        try:
+            progress = queue.submit(make_document("a"), spooled_file(tmp_path, "a"))
+            await wait_finished(progress)
+        finally:
+            await queue.stop()
+        return processor, progress, await queue_state.documents.find_one({"id": "a"})
+    
+    processor, progress, document = run(scenario())
+    assert progress.status == "failed"
+    assert progress.attempts == 3
+    assert progress.error == "encoder crashed"
+    assert backoff == [2, 4]
+    assert processor.discarded == ["a", "a", "a"]
+    assert document["processing_status"] == "failed"
+    assert not (tmp_path / "a.pdf").exists()
+
+def test_cancelled_queued_job_is_skipped(run, tmp_path, queue_state):
+    async def scenario():
+        processor = FakeProcessor(blocked=True)
+        queue = IngestionQueue(processor, worker_count=1)
+        queue.start()
+        try:
+            running = queue.submit(make_document("a"), spooled_file(tmp_path, "a"))
+            queued = queue.submit(make_document("b"), spooled_file(tmp_path, "b"))
+            while running.status != "processing":
+                await real_sleep(0.01)
+            # Only queued jobs are cancelled; a running job stops at its next batch instead
+            queue.cancel("a")
+            queue.cancel("b")
+            processor.release.set()
+            await wait_finished(running)
+            await wait_finished(queued)
+        finally:
+            await queue.stop()
+        return processor, running, queued
+    
+    processor, running, queued = run(scenario())
+    assert running.status == "completed"
+    assert queued.status == "cancelled"
+    assert queued.attempts == 0
+    assert processor.calls == ["a"]
+    assert not (tmp_path / "b.pdf").exists()
+
+def test_job_of_deleted_document_is_cancelled_before_processing(run, tmp_path, queue_state):
+    async def scenario():
+        server.deleting_documents.add("a")
+        processor = FakeProcessor()
+        queue = IngestionQueue(processor, worker_count=1)
+        queue.start()
+        try:
+            progress = queue.submit(make_document("a"), spooled_file(tmp_path, "a"))
+            await wait_finished(progress)
+        finally:
+            await queue.stop()
+        return processor, progress
+    
+    processor, progress = run(scenario())
+    assert progress.status == "cancelled"
+    assert processor.calls == []
+    assert processor.discarded == ["a"]
+
+def test_full_queue_rejects_submissions(run, tmp_path, queue_state):
+    async def scenario():
+        processor = FakeProcessor(blocked=True)
+        queue = IngestionQueue(processor, worker_count=1, max_depth=1)
+        queue.start()
+        try:
+            running = queue.submit(make_document("a"), spooled_file(tmp_path, "a"))
+            while running.status != "processing":
+                await real_sleep(0.01)
+            queue.submit(make_document("b"), spooled_file(tmp_path, "b"))
+            assert not queue.has_capacity()
+            with pytest.raises(IngestionQueueFull):
+                queue.submit(make_document("c"), spooled_file(tmp_path, "c"))
+            processor.release.set()
+            await queue._queue.join()
+        finally:
+            await queue.stop()
+        return queue
+    
+    queue = run(scenario())
+    assert [job.status for job in queue.jobs.values()] == ["completed", "completed"]
+    assert "c" not in queue.jobs
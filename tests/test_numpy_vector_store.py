@@ -0,0 +1,186 @@
+"""NumPy vector store: upsert, delete, filtered exact search, compaction and reload from disk"""
+
+import numpy as np
+import pytest
+
+from server import NumpyVectorStore, SearchFilters
+
+DIMENSION = 16
+
+def make_entries(count, seed=0, start=0):
+    """(chunk_id, vector, payload) entries spread over documents, pages and two languages"""
+    rng = np.random.default_rng(seed)
+    entries = []
+    for i in range(start, start + count):
+        payload = {
+            "text": f"chunk {i}",
+            "document_id": f"d{i // 10}",
+            "page_number": i % 12 + 1,
+            "chunk_index": i % 10,
+            "language": "de" if i % 4 == 0 else "en"
+        }
+        entries.append((f"c{i}", rng.standard_normal(DIMENSION).astype(np.float32), payload))
+    return entries
+
+def brute_force(entries, query, limit, filters=None):
+    """Chunk IDs and cosine similarities of the best `limit` entries matching `filters`"""
+    query = query / np.linalg.norm(query)
+    scored = []
+    for chunk_id, vector, payload in entries:
+        if filters is not None and not (
+            (not filters.document_ids or payload["document_id"] in filters.document_ids)
+            and (not filters.languages or payload["language"] in filters.languages)
+            and (filters.page_from is None or payload["page_number"] >= filters.page_from)
+            and (filters.page_to is None or payload["page_number"] <= filters.page_to)
+        ):
+            continue
+        scored.append((chunk_id, float(vector @ query / np.linalg.norm(vector))))
+    scored.sort(key=lambda hit: -hit[1])
+    return scored[:limit]
+
+def assert_same_hits(hits, expected):
+    assert [chunk_id for chunk_id, _, _ in hits] == [chunk_id for chunk_id, _ in expected]
+    # Vectors are stored as float16
+    assert np.allclose([score for _, score, _ in hits], [score for _, score in expected], atol=2e-3)
+
+@pytest.fixture
+def open_store(tmp_path, run):
+    """Factory for stores on one directory; every store it opened is closed at teardown"""
+    stores = []
+    
+    def open_store():
+        store = NumpyVectorStore(path=str(tmp_path / "vectors"), dimension=DIMENSION)
+        stores.append(store)
+        return store
+    
+    yield open_store
+    for store in stores:
+        run(store.close())
+
+def test_query_matches_brute_force(open_store, run):
+    store = open_store()
+    entries = make_entries(300)
+    run(store.upsert(entries))
+    assert run(store.count()) == 300
+    assert run(store.count("d3")) == 10
+    
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        query = rng.standard_normal(DIMENSION).astype(np.float32)
+        assert_same_hits(run(store.query(query.tolist(), 10)), brute_force(entries, query, 10))
+
+@pytest.mark.parametrize("filters", [
+    SearchFilters(document_ids=["d2", "d17"]),
+    SearchFilters(languages=["de"]),
+    SearchFilters(page_from=3, page_to=5),
+    SearchFilters(document_ids=["d1", "d2", "d3"], languages=["en"], page_to=6),
+    SearchFilters(languages=["fr"])
+])
+def test_filtered_query_matches_brute_force(open_store, run, filters):
+    store = open_store()
+    entries = make_entries(300)
+    run(store.upsert(entries))
+    query = np.random.default_rng(2).standard_normal(DIMENSION).astype(np.float32)
+    hits = run(store.query(query.tolist(), 8, filters))
+    assert_same_hits(hits, brute_force(entries, query, 8, filters))
+
+def test_hidden_documents_are_skipped(open_store, run):
+    store = open_store()
+    entries = make_entries(100)
+    run(store.upsert(entries))
+    query = np.random.default_rng(3).standard_normal(DIMENSION).astype(np.float32)
+    hits = run(store.query(query.tolist(), 100, hidden_documents=["d0", "d5"]))
+    assert len(hits) == 80
+    assert not {payload["document_id"] for _, _, payload in hits} & {"d0", "d5"}
+
+def test_upsert_replaces_existing_chunk(open_store, run):
+    store = open_store()
+    run(store.upsert(make_entries(20)))
+    vector = np.ones(DIMENSION, dtype=np.float32)
+    payload = {"text": "moved", "document_id": "d9", "page_number": 4, "chunk_index": 0, "language": "en"}
+    run(store.upsert([("c3", vector, payload)]))
+    
+    assert run(store.count()) == 20
+    assert run(store.count("d0")) == 9
+    assert run(store.count("d9")) == 1
+    [(chunk_id, stored, stored_payload)] = run(store.retrieve(["c3"]))
+    assert chunk_id == "c3" and stored_payload == payload
+    assert np.allclose(stored, vector / np.linalg.norm(vector), atol=1e-3)
+
+def test_deleted_vectors_are_gone(open_store, run):
+    store = open_store()
+    entries = make_entries(100)
+    run(store.upsert(entries))
+    run(store.delete(["c1", "c2", "missing"]))
+    run(store.delete_by_document("d4"))
+    
+    removed = {"c1", "c2"} | {f"c{i}" for i in range(40, 50)}
+    assert run(store.count()) == 88
+    assert run(store.count("d4")) == 0
+    assert "d4" not in run(store.document_ids())
+    assert run(store.retrieve(sorted(removed))) == []
+    query = np.random.default_rng(4).standard_normal(DIMENSION).astype(np.float32)
+    remaining = [entry for entry in entries if entry[0] not in removed]
+    assert_same_hits(run(store.query(query.tolist(), 100)), brute_force(remaining, query, 100))
+
+def test_compaction_keeps_live_vectors(open_store, run, tmp_path):
+    store = open_store()
+    store.COMPACT_MIN_DEAD = 50
+    entries = make_entries(200)
+    run(store.upsert(entries))
+    run(store.delete([f"c{i}" for i in range(200) if i % 5]))
+    
+    survivors = entries[::5]
+    assert store._dead_count == 0
+    assert store._size == len(survivors)
+    assert store._generation == 1
+    assert [path.name for path in (tmp_path / "vectors").glob("vectors*.f16*")] == ["vectors.1.f16"]
+    assert run(store.count()) == len(survivors)
+    query = np.random.default_rng(5).standard_normal(DIMENSION).astype(np.float32)
+    assert_same_hits(run(store.query(query.tolist(), 15)), brute_force(survivors, query, 15))
+    assert [payload["text"] for _, _, payload in run(store.retrieve(["c5", "c195"]))] == ["chunk 5", "chunk 195"]
+    
+    # New chunks go after the compacted rows
+    added = make_entries(30, seed=6, start=1000)
+    run(store.upsert(added))
+    assert_same_hits(run(store.query(query.tolist(), 15)), brute_force(survivors + added, query, 15))
+
+def test_reload_restores_vectors_and_payloads(open_store, run):
+    store = open_store()
+    store.COMPACT_MIN_DEAD = 50
+    entries = make_entries(200)
+    run(store.upsert(entries))
+    run(store.delete([f"c{i}" for i in range(0, 200, 2)]))
+    run(store.delete_by_document("d19"))
+    run(store.close())
+    
+    remaining = [entry for i, entry in enumerate(entries) if i % 2 and i < 190]
+    reopened = open_store()
+    assert run(reopened.count()) == len(remaining)
+    assert run(reopened.count("d19")) == 0
+    assert run(reopened.document_ids()) == {f"d{i}" for i in range(19)}
+    query = np.random.default_rng(7).standard_normal(DIMENSION).astype(np.float32)
+    assert_same_hits(run(reopened.query(query.tolist(), 20)), brute_force(remaining, query, 20))
+    assert_same_hits(
+        run(reopened.query(query.tolist(), 5, SearchFilters(languages=["en"], page_from=8))),
+        brute_force(remaining, query, 5, SearchFilters(languages=["en"], page_from=8))
+    )
+
+def test_reload_discards_files_of_other_generations(open_store, run, tmp_path):
+    store = open_store()
+    store.COMPACT_MIN_DEAD = 50
+    entries = make_entries(120)
+    run(store.upsert(entries))
+    run(store.delete([f"c{i}" for i in range(60)]))
+    run(store.close())
+    
+    # A compaction that crashed before its commit leaves the next generation's file behind,
+    # one that crashed after it leaves the previous generation's file
+    directory = tmp_path / "vectors"
+    (directory / "vectors.f16").write_bytes(b"\0" * 4096)
+    (directory / "vectors.2.f16").write_bytes(b"\0" * 4096)
+    reopened = open_store()
+    assert run(reopened.count()) == 60
+    assert [path.name for path in directory.glob("vectors*.f16*")] == ["vectors.1.f16"]
+    query = np.random.default_rng(8).standard_normal(DIMENSION).astype(np.float32)
+    assert_same_hits(run(reopened.query(query.tolist(), 10)), brute_force(entries[60:], query, 10))
@@ -0,0 +1,107 @@
+"""Keyset pagination: cursor round-trips, ties on the sort field and stability under inserts"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+
+import server
+from server import decode_cursor, encode_cursor, fetch_page
+
+# Millisecond precision, like datetimes stored in MongoDB
+START = datetime(2026, 3, 1, 12, 30, 15, 250000)
+
+def make_items(count):
+    """Items whose timestamps repeat in runs of three, so many pages start or end inside a tie"""
+    return [{"id": f"m{i:03d}", "timestamp": START + timedelta(seconds=i // 3), "n": i} for i in range(count)]
+
+async def read_all_pages(collection, descending, limit, query=None):
+    """Follow X-Next-Cursor to the end, returning the pages"""
+    pages = []
+    after = None
+    while True:
+        response = Response()
+        page = await fetch_page(collection, query or {}, {"n": 1}, "timestamp", descending, limit, after, response)
+        pages.append(page)
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            return pages
+        assert len(page) == limit
+
+@pytest.mark.parametrize("value", [
+    START,
+    datetime(2025, 12, 31, 23, 59, 59, 999000),
+    "2026-03-01 report.pdf",
+    42
+])
+def test_cursor_round_trips(value):
+    assert decode_cursor(encode_cursor(value, "item-1")) == (value, "item-1")
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", encode_cursor(START, "x")[:-4], ""])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 4, 5, 25, 100])
+def test_pages_cover_every_item_once_in_order(run, db, descending, limit):
+    items = make_items(25)
+    run(db.chat_messages.insert_many([dict(item) for item in items]))
+    
+    pages = run(read_all_pages(db.chat_messages, descending, limit))
+    returned = [item["id"] for page in pages for item in page]
+    expected = sorted(items, key=lambda item: (item["timestamp"], item["id"]), reverse=descending)
+    assert returned == [item["id"] for item in expected]
+    assert len(pages) == max(1, -(-25 // limit))
+    assert all("_id" not in item and set(item) == {"id", "timestamp", "n"} for page in pages for item in page)
+
+def test_pages_only_cover_matching_items(run, db):
+    items = make_items(30)
+    for item in items:
+        item["session_id"] = "s1" if item["n"] % 2 else "s2"
+    run(db.chat_messages.insert_many(items))
+    
+    pages = run(read_all_pages(db.chat_messages, False, 4, {"session_id": "s1"}))
+    assert [item["n"] for page in pages for item in page] == list(range(1, 30, 2))
+
+def test_insert_after_first_page_does_not_shift_later_pages(run, db):
+    items = make_items(20)
+    run(db.chat_messages.insert_many([dict(item) for item in items]))
+    
+    response = Response()
+    first = run(fetch_page(db.chat_messages, {}, {"n": 1}, "timestamp", True, 5, None, response))
+    # A newer item lands before the cursor position, inside the tie of the first page
+    run(db.chat_messages.insert_many([
+        {"id": "m999", "timestamp": START + timedelta(seconds=100), "n": 999},
+        {"id": "m000a", "timestamp": items[-1]["timestamp"], "n": 1000}
+    ]))
+    after = response.headers["X-Next-Cursor"]
+    rest = []
+    while after:
+        response = Response()
+        rest.extend(run(fetch_page(db.chat_messages, {}, {"n": 1}, "timestamp", True, 5, after, response)))
+        after = response.headers.get("X-Next-Cursor")
+    
+    assert [item["n"] for item in first + rest] == list(range(19, -1, -1))
+
+def test_documents_endpoint_pages_newest_first(run, db):
+    documents = [
+        {
+            "id": f"doc{i:02d}", "filename": f"{i}.pdf", "page_count": 1, "language": "en",
+            "processing_status": "completed", "chunk_count": 3, "uploaded_at": START + timedelta(minutes=i // 2)
+        }
+        for i in range(9)
+    ]
+    run(db.documents.insert_many(documents))
+    
+    returned = []
+    after = None
+    while True:
+        response = Response()
+        returned.extend(run(server.get_documents(response, limit=2, after=after)))
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+    assert [document["id"] for document in returned] == [f"doc{i:02d}" for i in range(8, -1, -1)]
+    assert returned[0]["status"] == "completed"
@@ -0,0 +1,108 @@
+"""Startup reconciliation of the vector index with the documents and chunks stored in MongoDB"""
+
+import numpy as np
+import pytest
+
+import server
+from server import DocumentChunk, chunk_to_document, restore_vector_index
+from tests.conftest import fake_vector
+
+@pytest.fixture
+def index_state(monkeypatch, db, vector_store, fake_encoder):
+    """Module state restore_vector_index reads; the queue is never started, only its jobs are consulted"""
+    queue = server.IngestionQueue(server.pdf_processor, worker_count=1)
+    monkeypatch.setattr(server, "ingestion_queue", queue)
+    return queue
+
+async def seed(document_id, status, chunk_count, indexed, stored=True):
+    """A document with `chunk_count` chunks in MongoDB, of which the first `indexed` are in the vector index"""
+    chunks = [
+        DocumentChunk(
+            id=f"{document_id}-{i}",
+            document_id=document_id,
+            text=f"Paragraph {i} of {document_id} about torque limits",
+            page_number=i + 1,
+            chunk_index=i,
+            language="en"
+        )
+        for i in range(chunk_count)
+    ]
+    for chunk in chunks:
+        chunk.embedding = fake_vector(chunk.text).tolist()
+    if stored:
+        await server.db.documents.insert_one({
+            "id": document_id, "filename": f"{document_id}.pdf", "page_count": chunk_count, "language": "en",
+            "file_hash": document_id, "processing_status": status, "chunk_count": chunk_count
+        })
+        if chunks:
+            await server.db.document_chunks.insert_many([chunk_to_document(chunk) for chunk in chunks])
+    if indexed:
+        await server.vector_store.store_chunks(chunks[:indexed])
+    return chunks
+
+async def state_of(document_id):
+    document = await server.db.documents.find_one({"id": document_id})
+    return {
+        "status": document["processing_status"] if document else None,
+        "chunks": await server.db.document_chunks.count_documents({"document_id": document_id}),
+        "vectors": await server.vector_store.count(document_id)
+    }
+
+def test_restore_reconciles_every_document_state(run, index_state):
+    async def scenario():
+        await seed("complete", "completed", 6, 6)
+        missing = await seed("missing", "completed", 5, 2)
+        await seed("interrupted", "processing", 3, 3)
+        await seed("running", "processing", 4, 4)
+        await seed("failed", "failed", 3, 1)
+        await seed("deleting", "deleting", 2, 2)
+        await seed("vanished", None, 2, 2, stored=False)
+        # Accepted by this process after startup, so its chunks are being written right now
+        index_state.jobs["running"] = server.IngestionProgress(document_id="running", status="processing")
+        
+        await restore_vector_index()
+        states = {
+            document_id: await state_of(document_id)
+            for document_id in ("complete", "missing", "interrupted", "running", "failed", "deleting", "vanished")
+        }
+        restored = await server.vector_store.retrieve([chunk.id for chunk in missing])
+        return missing, states, restored
+    
+    missing, states, restored = run(scenario())
+    assert states == {
+        "complete": {"status": "completed", "chunks": 6, "vectors": 6},
+        "missing": {"status": "completed", "chunks": 5, "vectors": 5},
+        "interrupted": {"status": "failed", "chunks": 0, "vectors": 0},
+        "running": {"status": "processing", "chunks": 4, "vectors": 4},
+        "failed": {"status": "failed", "chunks": 0, "vectors": 0},
+        "deleting": {"status": "deleting", "chunks": 2, "vectors": 2},
+        "vanished": {"status": None, "chunks": 0, "vectors": 0}
+    }
+    # Restored from the stored embeddings, without re-encoding, and searchable lexically again
+    for (chunk_id, vector, payload), chunk in zip(restored, missing):
+        assert chunk_id == chunk.id and payload["text"] == chunk.text
+        assert np.allclose(vector, chunk.embedding, atol=1e-2)
+    assert {chunk_id for chunk_id, _ in server.bm25_index.search("missing", 10)} == {chunk.id for chunk in missing}
+
+def test_restore_leaves_a_consistent_index_alone(run, index_state, monkeypatch):
+    stored = []
+    
+    async def scenario():
+        await seed("a", "completed", 4, 4)
+        await seed("b", "completed", 3, 3)
+        await seed("c", "failed", 0, 0)
+        monkeypatch.setattr(server.vector_store, "store_chunks", lambda chunks: stored.append(chunks))
+        await restore_vector_index()
+        return await server.vector_store.count()
+    
+    assert run(scenario()) == 7
+    assert stored == []
+
+def test_restore_rebuilds_an_empty_index(run, index_state):
+    async def scenario():
+        for document_number in range(3):
+            await seed(f"d{document_number}", "completed", 7, 0)
+        await restore_vector_index()
+        return [await server.vector_store.count(f"d{document_number}") for document_number in range(3)]
+    
+    assert run(scenario()) == [7, 7, 7]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark recall, latency and memory of vector index settings
+Loads the same vectors into one temporary Qdrant collection per setting (HNSW m/ef_construct,
+search ef, scalar/binary quantization with and without rescoring) and compares each against
+exact brute-force top-k. Requires a Qdrant server (QDRANT_URL); local mode has no HNSW index.
+"""
+
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, HnswConfigDiff, OptimizersConfigDiff, SearchParams,
+    QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, CollectionStatus
+)
+
+QDRANT_URL = os.environ.get("QDRANT_URL")
+VECTOR_COUNT = int(os.environ.get("BENCH_VECTORS", "50000"))
+QUERY_COUNT = int(os.environ.get("BENCH_QUERIES", "200"))
+DIMENSION = 768
+TOP_K = 10
+UPLOAD_BATCH = 1000
+
+# (label, quantization, rescore, oversampling, m, ef_construct, search ef)
+SETTINGS = [
+    ("float32 m=16 ef=64", None, False, None, 16, 100, 64),
+    ("float32 m=16 ef=128", None, False, None, 16, 100, 128),
+    ("float32 m=32 ef=256", None, False, None, 32, 200, 256),
+    ("int8", "scalar", False, None, 16, 100, 128),
+    ("int8 + rescore x2", "scalar", True, 2.0, 16, 100, 128),
+    ("binary", "binary", False, None, 16, 100, 128),
+    ("binary + rescore x2", "binary", True, 2.0, 16, 100, 128),
+    ("binary + rescore x4", "binary", True, 4.0, 16, 100, 128),
+]
+
+def load_vectors():
+    """Real chunk embeddings from MongoDB when BENCH_FROM_MONGO=1, otherwise clustered synthetic vectors"""
+    if os.environ.get("BENCH_FROM_MONGO") == "1":
+        from pymongo import MongoClient
+        collection = MongoClient(os.environ["MONGO_URL"])[os.environ["DB_NAME"]].document_chunks
+        cursor = collection.find(
+            {"embedding": {"$ne": None}}, {"_id": 0, "embedding": 1, "embedding_dtype": 1}
+        ).limit(VECTOR_COUNT + QUERY_COUNT)
+        # Packed binary rows carry their dtype; legacy rows hold float arrays
+        vectors = np.array([
+            np.frombuffer(chunk["embedding"], dtype=chunk["embedding_dtype"]) if "embedding_dtype" in chunk
+            else chunk["embedding"]
+            for chunk in cursor
+        ], dtype=np.float32)
+    else:
+        # Topic clusters resemble sentence embeddings far better than uniform noise
+        rng = np.random.default_rng(42)
+        centers = rng.normal(size=(256, DIMENSION)).astype(np.float32)
+        assignments = rng.integers(0, len(centers), VECTOR_COUNT + QUERY_COUNT)
+        vectors = centers[assignments] + 0.6 * rng.normal(size=(len(assignments), DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:-QUERY_COUNT], vectors[-QUERY_COUNT:]
+
+def estimate_ram_mb(count, quantization, m):
+    """Estimated resident index size: searched vectors plus the HNSW graph (float32 originals on disk when quantized)"""
+    if quantization == "scalar":
+        vector_bytes = DIMENSION
+    elif quantization == "binary":
+        vector_bytes = DIMENSION // 8
+    else:
+        vector_bytes = DIMENSION * 4
+    # Level 0 holds up to 2*m links per point, 4 bytes each
+    graph_bytes = 2 * m * 4
+    return count * (vector_bytes + graph_bytes) / (1024 * 1024)
+
+def quantization_config(quantization):
+    if quantization == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+def build_collection(client, name, vectors, quantization, m, ef_construct):
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=DIMENSION, distance=Distance.COSINE, on_disk=quantization is not None),
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct),
+        quantization_config=quantization_config(quantization),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1000)
+    )
+    for start in range(0, len(vectors), UPLOAD_BATCH):
+        client.upsert(
+            collection_name=name,
+            points=[
+                PointStruct(id=str(uuid.uuid4()), vector=vector.tolist(), payload={"position": start + offset})
+                for offset, vector in enumerate(vectors[start:start + UPLOAD_BATCH])
+            ],
+            wait=True
+        )
+    # Recall is only meaningful once the HNSW graph has been built
+    while True:
+        info = client.get_collection(name)
+        if info.status == CollectionStatus.GREEN and (info.indexed_vectors_count or 0) >= len(vectors):
+            return
+        time.sleep(0.5)
+
+def measure(client, name, queries, ground_truth, quantization, rescore, oversampling, ef):
+    quantization_params = None
+    if quantization is not None:
+        quantization_params = QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    params = SearchParams(hnsw_ef=ef, quantization=quantization_params)
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, ground_truth):
+        started = time.perf_counter()
+        results = client.search(collection_name=name, query_vector=query.tolist(), limit=TOP_K, search_params=params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len({result.payload["position"] for result in results} & expected)
+    return hits / (len(queries) * TOP_K), np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+def run_benchmark():
+    """Report recall@10, latency and estimated RAM for every setting"""
+    if not QDRANT_URL:
+        print("❌ Set QDRANT_URL to a Qdrant server; local mode searches exactly and ignores index settings")
+        return False
+    client = QdrantClient(url=QDRANT_URL, api_key=os.environ.get("QDRANT_API_KEY"), timeout=120)
+    vectors, queries = load_vectors()
+    print(f"Benchmark: {len(vectors)} vectors, {len(queries)} queries, recall@{TOP_K} against exact search")
+
+    # Exact top-k by brute force on normalized vectors
+    scores = queries @ vectors.T
+    ground_truth = [set(np.argpartition(-row, TOP_K)[:TOP_K].tolist()) for row in scores]
+
+    print(f"{'setting':<24} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'RAM MB':>8} {'build s':>8}")
+    for label, quantization, rescore, oversampling, m, ef_construct, ef in SETTINGS:
+        name = f"index_benchmark_{uuid.uuid4().hex[:8]}"
+        try:
+            started = time.perf_counter()
+            build_collection(client, name, vectors, quantization, m, ef_construct)
+            build_elapsed = time.perf_counter() - started
+            recall, p50, p95 = measure(client, name, queries, ground_truth, quantization, rescore, oversampling, ef)
+            ram = estimate_ram_mb(len(vectors), quantization, m)
+            print(f"{label:<24} {recall:>7.3f} {p50:>8.2f} {p95:>8.2f} {ram:>8.1f} {build_elapsed:>8.1f}")
+        finally:
+            client.delete_collection(name)
+    print("✅ Benchmark complete")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmark() else 1)